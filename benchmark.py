@@ -0,0 +1,550 @@
+"""
+Benchmark suite for Task Manager application.
+
+Fills databases with a deterministic synthetic dataset, then times every
+DatabaseManager method and the window's task loading, searching and
+statistics under Qt's offscreen platform. The report is JSON, so a run
+before a change can be compared with one after it:
+    
+    python benchmark.py --sizes 1000,10000 --output before.json
+    python benchmark.py --sizes 1000,10000 --compare before.json
+
+Generated databases are kept in --data-dir and reused by later runs.
+Every run works on a copy, so the writes it times never change them.
+"""
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional
+
+from database import DatabaseManager
+from sqltrace import SqlTracer
+
+REPORT_VERSION = 1
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_SEED = 1
+DEFAULT_REPEAT = 5
+
+# Relative weights of the categories of generated tasks
+CATEGORY_WEIGHTS = {
+    'General': 30, 'Work': 28, 'Personal': 16, 'Shopping': 10, 'Health': 7, 'Finance': 6,
+    'Home': 1, 'Travel': 1, 'Study': 1,
+}
+PRIORITY_WEIGHTS = {1: 20, 2: 50, 3: 30}
+COMPLETED_SHARE = 0.35
+NO_DUE_SHARE = 0.2
+DESCRIBED_SHARE = 0.6
+
+WORDS = (
+    "review report budget meeting email call plan draft update invoice client team "
+    "project design fix test deploy release notes schedule order groceries doctor "
+    "appointment pay rent bills taxes book flight hotel clean garage garden laundry "
+    "gym run read chapter study exam prepare slides presentation follow up contract "
+    "renew insurance backup photos sort files organize desk buy gift birthday party "
+    "call mom dentist car service oil change water plants walk dog library return"
+).split()
+
+
+def generate_tasks(count: int, seed: int = DEFAULT_SEED,
+                   reference: datetime = None) -> Iterator[Dict]:
+    """Yield count synthetic tasks as add_tasks arguments.
+    
+    The same seed and reference give the same tasks. Due dates are
+    around the reference: pending tasks mostly in the coming weeks with
+    some overdue, completed tasks mostly in the past.
+    """
+    rng = random.Random(seed)
+    if reference is None:
+        reference = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    categories = list(CATEGORY_WEIGHTS)
+    category_weights = list(CATEGORY_WEIGHTS.values())
+    priorities = list(PRIORITY_WEIGHTS)
+    priority_weights = list(PRIORITY_WEIGHTS.values())
+    
+    def sentence(low: int, high: int) -> str:
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+    
+    for _ in range(count):
+        completed = rng.random() < COMPLETED_SHARE
+        due_date = None
+        if rng.random() >= NO_DUE_SHARE:
+            if completed:
+                days = rng.uniform(-180, 7)
+            else:
+                days = rng.triangular(-30, 120, 7)
+            # Due times fall on quarter hours
+            minutes = int(days * 24 * 4) * 15
+            due_date = (reference + timedelta(minutes=minutes)).isoformat(timespec='seconds')
+        
+        description = ""
+        if rng.random() < DESCRIBED_SHARE:
+            description = '. '.join(sentence(6, 14) for _ in range(rng.randint(1, 3))) + '.'
+        
+        yield {
+            'title': sentence(2, 5).capitalize(),
+            'description': description,
+            'priority': rng.choices(priorities, priority_weights)[0],
+            'due_date': due_date,
+            'completed': completed,
+            'category': rng.choices(categories, category_weights)[0],
+        }
+
+
+def fill_database(path: str, count: int, seed: int = DEFAULT_SEED,
+                  reference: datetime = None, batch_size: int = 10000) -> float:
+    """Create a database of count generated tasks at path, returning the seconds taken.
+    
+    The database is built under a temporary name and only appears at
+    path once complete.
+    """
+    partial = path + ".part"
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(partial + suffix):
+            os.remove(partial + suffix)
+    
+    started = time.perf_counter()
+    db = DatabaseManager(partial, 'fast')
+    try:
+        batch = []
+        for task in generate_tasks(count, seed, reference):
+            batch.append(task)
+            if len(batch) >= batch_size:
+                db.add_tasks(batch)
+                batch = []
+        if batch:
+            db.add_tasks(batch)
+        db.conn.execute("PRAGMA optimize")
+    finally:
+        db.close()
+    os.replace(partial, path)
+    return time.perf_counter() - started
+
+
+def task_count(path: str) -> int:
+    """Count the tasks of a database file, 0 if it cannot be read."""
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return 0
+
+
+def dataset(data_dir: str, count: int, seed: int, reference: datetime) -> Dict:
+    """Get the generated database of a size, generating it if it is missing."""
+    path = os.path.join(data_dir, f"tasks-{count}-{seed}-{reference:%Y%m%d}.db")
+    info = {'size': count, 'path': path, 'generate_s': None}
+    if task_count(path) != count:
+        log(f"Generating {count} tasks into {path}")
+        info['generate_s'] = round(fill_database(path, count, seed, reference), 3)
+    info['db_bytes'] = os.path.getsize(path)
+    return info
+
+
+def measure(run: Callable[[], object], repeat: int,
+            setup: Callable[[], None] = None) -> Dict:
+    """Time repeat runs of a function, setup runs untimed before each."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - started) * 1000)
+    return {
+        'runs': repeat,
+        'min_ms': round(min(times), 3),
+        'median_ms': round(statistics.median(times), 3),
+        'mean_ms': round(statistics.fmean(times), 3),
+        'max_ms': round(max(times), 3),
+    }
+
+
+def log(message: str):
+    """Print progress to stderr, stdout is kept for the report."""
+    print(message, file=sys.stderr, flush=True)
+
+
+class Case:
+    """One timed operation of the suite."""
+    
+    def __init__(self, name: str, run: Callable[[], object], variant: str = "",
+                 setup: Callable[[], None] = None, repeat: int = None):
+        self.name = name
+        self.variant = variant
+        self.run = run
+        self.setup = setup
+        self.repeat = repeat  # fixed number of runs, for slow or one-off cases
+    
+    def measure(self, repeat: int) -> Dict:
+        """Time the case and describe the result."""
+        result = {'name': self.name, 'variant': self.variant}
+        result.update(measure(self.run, self.repeat or repeat, self.setup))
+        return result
+
+
+def database_cases(db: DatabaseManager, workdir: str, size: int, seed: int) -> List[Case]:
+    """Build the cases timing the DatabaseManager methods.
+    
+    Cold variants clear the task cache first, warm ones run after it is
+    filled. Cases that write come after the reads, and deleting all
+    completed tasks comes last.
+    """
+    rng = random.Random(seed)
+    max_id = db.conn.execute("SELECT MAX(id) FROM tasks").fetchone()[0]
+    task_ids = rng.sample(range(1, max_id + 1), min(max_id, 3000))
+    # Separate ids to read, update and delete, reused on small datasets
+    third = len(task_ids) // 3
+    reads = itertools.cycle(task_ids[:third])
+    updates = itertools.cycle(task_ids[third:2 * third])
+    deletes = itertools.cycle(task_ids[2 * third:])
+    
+    # Key of a page half way down the pending list
+    middle = db.conn.execute(
+        "SELECT priority, due_ts, id FROM tasks WHERE completed = 0 "
+        f"{db.TASKS_ORDER} LIMIT 1 OFFSET ?", (size * (1 - COMPLETED_SHARE) // 2,)
+    ).fetchone()
+    
+    import_path = os.path.join(workdir, "import.jsonl")
+    with open(import_path, 'w', encoding='utf-8') as file:
+        for task in generate_tasks(1000, seed + 1):
+            file.write(json.dumps(task) + "\n")
+    export_paths = iter(os.path.join(workdir, f"export-{index}") for index in range(1000))
+    slow = 1 if size >= 100000 else 3
+    cold = db.cache.clear
+    new_tasks = list(generate_tasks(1000, seed + 2))
+    
+    reads_cases = [
+        ('get_tasks', lambda: db.get_tasks(False), "", slow),
+        ('get_tasks', lambda: db.get_tasks(False, 'Work'), "category", slow),
+        ('iter_tasks', lambda: db.iter_tasks(False), "first page", None),
+        ('iter_tasks', lambda: db.iter_tasks(False, after=tuple(middle)), "middle page", None),
+        ('get_task', lambda: db.get_task(task_ids[0]), "", None),
+        ('search', lambda: db.search("report"), "common word", None),
+        ('search', lambda: db.search("dentist insurance"), "two words", None),
+        ('get_task_statistics', db.get_task_statistics, "", None),
+    ]
+    cases = []
+    for name, run, detail, repeat in reads_cases:
+        # A warm run follows an untimed one that fills the cache
+        cases.append(Case(name, run, f"cold {detail}".rstrip(), cold, repeat))
+        cases.append(Case(name, run, f"warm {detail}".rstrip(), run, repeat))
+    
+    cases += [
+        Case('get_task', lambda: db.get_task(next(reads)), "cold distinct ids", cold),
+        Case('stream_tasks', lambda: sum(len(chunk) for chunk in db.stream_tasks(True)),
+             "completed", cold, slow),
+        Case('get_categories', db.get_categories),
+        Case('category_id', lambda: db.category_id('Work')),
+        Case('effective_pragmas', db.effective_pragmas),
+        Case('explain_queries', db.explain_queries, repeat=1),
+        Case('export', lambda: db.export(next(export_paths) + ".jsonl"), "jsonl", repeat=slow),
+        Case('export', lambda: db.export(next(export_paths) + ".csv"), "csv", repeat=slow),
+        Case('add_task', lambda: db.add_task("Benchmark task", "added", 2,
+                                             "2030-01-01T09:00:00", "Work")),
+        Case('add_tasks', lambda: db.add_tasks(new_tasks), "1000 tasks"),
+        Case('update_task', lambda: db.update_task(next(updates), completed=True, priority=1)),
+        Case('update_tasks', lambda: db.update_tasks(
+            {next(updates): {'title': "Renamed"} for _ in range(50)}), "50 tasks"),
+        Case('apply_edits', lambda: db.apply_edits(
+            {next(updates): {'completed': False} for _ in range(20)},
+            [next(deletes) for _ in range(5)]), "20 updates, 5 deletes"),
+        Case('delete_task', lambda: db.delete_task(next(deletes))),
+        Case('delete_tasks', lambda: db.delete_tasks(next(deletes) for _ in range(50)),
+             "50 tasks"),
+        Case('add_category', lambda: db.add_category(f"Bench {rng.random()}")),
+        Case('import_tasks', lambda: db.import_tasks(import_path), "1000 tasks jsonl"),
+        Case('delete_completed_tasks', db.delete_completed_tasks, repeat=1),
+    ]
+    return cases
+
+
+def run_database(info: Dict, workdir: str, seed: int, repeat: int,
+                 tracer: SqlTracer = None) -> List[Dict]:
+    """Time the DatabaseManager methods on a copy of a generated database."""
+    path = os.path.join(workdir, "tasks.db")
+    shutil.copyfile(info['path'], path)
+    db = DatabaseManager(path, tracer=tracer)
+    try:
+        results = []
+        for case in database_cases(db, workdir, info['size'], seed):
+            log(f"  {case.name} {case.variant}".rstrip())
+            result = case.measure(repeat)
+            result['group'] = 'database'
+            results.append(result)
+        return results
+    finally:
+        db.close()
+
+
+class GuiRunner:
+    """Runs the main window on a database and waits for its work to finish.
+    
+    Work is started on the GUI thread and waited for in a nested event
+    loop that quits on the signal announcing the result, so the timings
+    include delivering results to the window.
+    """
+    TIMEOUT_MS = 600000
+    
+    def __init__(self):
+        from PyQt6.QtWidgets import QApplication
+        self.app = QApplication.instance() or QApplication([sys.argv[0]])
+    
+    def run_until(self, signal, start: Callable[[], object],
+                  accept: Callable[..., bool] = lambda *args: True):
+        """Call start and wait for signal to be emitted with accepted arguments."""
+        from PyQt6.QtCore import QEventLoop, QTimer
+        loop = QEventLoop()
+        timed_out = []
+        
+        def emitted(*args):
+            if accept(*args):
+                loop.quit()
+        
+        signal.connect(emitted)
+        timer = QTimer()
+        timer.setSingleShot(True)
+        timer.timeout.connect(lambda: (timed_out.append(True), loop.quit()))
+        timer.start(self.TIMEOUT_MS)
+        try:
+            start()
+            loop.exec()
+        finally:
+            timer.stop()
+            signal.disconnect(emitted)
+        if timed_out:
+            raise TimeoutError(f"No {signal} within {self.TIMEOUT_MS} ms")
+    
+    def settle(self, window):
+        """Wait for the window's database requests and deliver their results."""
+        window.db.call(lambda db: None)
+        for _ in range(3):
+            self.app.processEvents()
+            time.sleep(0.01)
+    
+    def open_window(self):
+        """Create the main window and wait for its first page of pending tasks."""
+        import main
+        window = main.TaskManagerApp()
+        window.confirm_exit = False
+        window.show()
+        # Pages are delivered through the event loop, so none has arrived yet
+        self.run_until(window.pending_model.rowsInserted, lambda: None)
+        return window
+    
+    def cases(self, window) -> List[Case]:
+        """Build the cases timing the window's loading, search and statistics."""
+        def clear_cache():
+            window.db.call(lambda db: db.cache.clear())
+            self.settle(window)
+        
+        def load_tasks():
+            self.run_until(window.pending_model.rowsInserted, window.load_tasks)
+        
+        def update_statistics():
+            self.run_until(window.db.request_done, window.update_statistics,
+                           lambda request: request.method == 'get_task_statistics')
+        
+        def search(text: str):
+            def run():
+                window.search_input.setText(text)
+                self.run_until(window.search_worker.results_ready, window.search_tasks,
+                               lambda generation, query, tasks:
+                               generation == window.search_generation)
+            return run
+        
+        def clear_search():
+            window.search_input.blockSignals(True)
+            window.search_input.clear()
+            window.search_input.blockSignals(False)
+            load_tasks()
+            clear_cache()
+        
+        return [
+            Case('load_tasks', load_tasks, "cold", clear_cache),
+            Case('load_tasks', load_tasks, "warm", load_tasks),
+            Case('update_statistics', update_statistics, "cold", clear_cache),
+            Case('update_statistics', update_statistics, "warm", lambda: self.settle(window)),
+            Case('search_tasks', search("report"), "common word", clear_search),
+            Case('search_tasks', search("dentist insurance"), "two words", clear_search),
+        ]
+    
+    def run(self, info: Dict, workdir: str, repeat: int) -> List[Dict]:
+        """Time the window on a copy of a generated database."""
+        directory = os.path.join(workdir, "gui")
+        os.makedirs(directory, exist_ok=True)
+        # The window opens tasks.db in the working directory
+        shutil.copyfile(info['path'], os.path.join(directory, "tasks.db"))
+        previous = os.getcwd()
+        os.chdir(directory)
+        try:
+            results = []
+            log("  startup")
+            windows = []
+            startup = measure(lambda: windows.append(self.open_window()), 1)
+            results.append({'name': 'startup', 'variant': "first page", **startup,
+                            'group': 'gui'})
+            window = windows[0]
+            try:
+                self.settle(window)
+                for case in self.cases(window):
+                    log(f"  {case.name} {case.variant}".rstrip())
+                    result = case.measure(repeat)
+                    result['group'] = 'gui'
+                    results.append(result)
+            finally:
+                window.close()
+                window.deleteLater()
+                self.app.processEvents()
+            return results
+        finally:
+            os.chdir(previous)
+
+
+def environment() -> Dict:
+    """Describe where the benchmark ran."""
+    from PyQt6.QtCore import PYQT_VERSION_STR, QT_VERSION_STR
+    return {
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'qt': QT_VERSION_STR,
+        'pyqt': PYQT_VERSION_STR,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run_benchmarks(sizes, seed: int = DEFAULT_SEED, repeat: int = DEFAULT_REPEAT,
+                   data_dir: str = None, reference: datetime = None,
+                   gui: bool = True, trace_sql: bool = False) -> Dict:
+    """Run the suite on each dataset size and build the report.
+    
+    With trace_sql each dataset also gets the statistics of every SQL
+    statement the database cases ran.
+    """
+    if reference is None:
+        reference = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    data_dir = data_dir or os.path.join(tempfile.gettempdir(), "taskmanager-benchmark")
+    os.makedirs(data_dir, exist_ok=True)
+    runner = GuiRunner() if gui else None
+    
+    report = {
+        'version': REPORT_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'seed': seed,
+        'repeat': repeat,
+        'reference': reference.isoformat(timespec='seconds'),
+        'environment': environment(),
+        'datasets': [],
+    }
+    for size in sizes:
+        info = dataset(data_dir, size, seed, reference)
+        log(f"Benchmarking {size} tasks")
+        tracer = SqlTracer() if trace_sql else None
+        with tempfile.TemporaryDirectory(prefix="taskmanager-bench-") as workdir:
+            results = run_database(info, workdir, seed, repeat, tracer)
+            if runner is not None:
+                results += runner.run(info, workdir, repeat)
+        data = {
+            'size': size,
+            'generate_s': info['generate_s'],
+            'db_bytes': info['db_bytes'],
+            'results': results,
+        }
+        if tracer is not None:
+            data['sql'] = tracer.report()
+        report['datasets'].append(data)
+    return report
+
+
+def compare(before: Dict, after: Dict) -> List[Dict]:
+    """Pair the median times of two reports, for cases present in both."""
+    def medians(report: Dict) -> Dict:
+        return {
+            (data['size'], result['group'], result['name'], result['variant']):
+                result['median_ms']
+            for data in report['datasets'] for result in data['results']
+        }
+    
+    old = medians(before)
+    rows = []
+    for key, median in medians(after).items():
+        if key in old:
+            size, group, name, variant = key
+            rows.append({
+                'size': size, 'group': group, 'name': name, 'variant': variant,
+                'before_ms': old[key], 'after_ms': median,
+                'ratio': round(median / old[key], 3) if old[key] else None,
+            })
+    return rows
+
+
+def format_comparison(rows: List[Dict]) -> str:
+    """Format compared medians as a table, ratios below 1 are speedups."""
+    lines = [f"{'size':>8} {'case':<48} {'before ms':>11} {'after ms':>11} {'ratio':>7}"]
+    for row in rows:
+        case = f"{row['group']}.{row['name']} {row['variant']}".rstrip()
+        ratio = "-" if row['ratio'] is None else f"{row['ratio']:.2f}"
+        lines.append(f"{row['size']:>8} {case:<48} {row['before_ms']:>11.3f} "
+                     f"{row['after_ms']:>11.3f} {ratio:>7}")
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="comma separated task counts, e.g. 1000,10000,100000,1000000")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED,
+                        help="seed of the generated datasets")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help="runs of each case, slow cases run fewer times")
+    parser.add_argument('--reference', type=datetime.fromisoformat,
+                        help="date the generated due dates are spread around, default today")
+    parser.add_argument('--data-dir', help="directory of the generated databases")
+    parser.add_argument('--no-gui', action='store_true', help="skip the window benchmarks")
+    parser.add_argument('--trace-sql', action='store_true',
+                        help="add per-statement SQL statistics, tracing slows the cases down")
+    parser.add_argument('--output', help="write the report to a file instead of stdout")
+    parser.add_argument('--compare', metavar='REPORT',
+                        help="print the change from an earlier report")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Benchmark entry point."""
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    report = run_benchmarks(sizes, args.seed, args.repeat, args.data_dir,
+                            args.reference, gui=not args.no_gui, trace_sql=args.trace_sql)
+    
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            before = json.load(file)
+        log(format_comparison(compare(before, report)))
+
+
+if __name__ == "__main__":
+    main()
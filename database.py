@@ -2,95 +2,902 @@
 Database module for Task Manager application.
 Handles all SQLite database operations.
 """
+import csv
+import json
+import logging
+import math
+import os
+import re
 import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Union
 
+import importer
+from models import (DEFAULT_CATEGORIES, DEFAULT_CATEGORY_COLOR, Category, CategoryRegistry,
+                    Task, due_timestamp)
+from profiling import profile_methods, span
+import sqltrace
+from sqltrace import SqlTracer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class StorageProfile:
+    """SQLite settings applied to every connection a DatabaseManager opens."""
+    name: str = "durable"
+    journal_mode: str = "WAL"
+    synchronous: str = "FULL"
+    cache_size: int = -16000  # negative values are KiB
+    mmap_size: int = 256 * 1024 * 1024  # bytes read through mmap
+    temp_store: str = "MEMORY"
+    busy_timeout: int = 5000  # milliseconds
+    wal_autocheckpoint: int = 1000  # pages
+    
+    def pragmas(self) -> Dict:
+        """Get pragma values in the order they are applied."""
+        return {
+            'busy_timeout': self.busy_timeout,
+            'journal_mode': self.journal_mode,
+            'synchronous': self.synchronous,
+            'cache_size': self.cache_size,
+            'mmap_size': self.mmap_size,
+            'temp_store': self.temp_store,
+            'wal_autocheckpoint': self.wal_autocheckpoint,
+        }
+
+
+STORAGE_PROFILES = {
+    # WAL with a sync on every commit, nothing committed is lost
+    'durable': StorageProfile(),
+    # WAL syncing only at checkpoints, commits survive app crashes
+    # but the latest ones may be lost on power failure
+    'fast': replace(
+        StorageProfile(), name='fast', synchronous='NORMAL',
+        cache_size=-64000, mmap_size=1024 * 1024 * 1024, wal_autocheckpoint=4000
+    ),
+    # No journal file and no syncing, for throwaway and :memory: databases
+    'test': replace(
+        StorageProfile(), name='test', journal_mode='MEMORY',
+        synchronous='OFF', mmap_size=0
+    ),
+}
+
+
+class ConnectionPool:
+    """Read-only connections to a database, shared between threads.
+    
+    Connections are checked out for the duration of a read and checked in
+    afterwards. A thread that checks out a connection keeps using that one
+    until it gives it back, so nested reads on a thread never need a
+    second connection. With WAL journaling readers work on a snapshot and
+    run alongside the writer and each other.
+    """
+    # Pragmas that only matter to the connection that writes
+    WRITER_PRAGMAS = ('journal_mode', 'synchronous', 'wal_autocheckpoint')
+    
+    def __init__(self, db_name: str, profile: StorageProfile, size: int = 4,
+                 tracer: SqlTracer = None):
+        self.db_name = db_name
+        self.profile = profile
+        self.size = size
+        self.tracer = tracer
+        self._idle = []
+        self._opened = []
+        self._condition = threading.Condition()
+        self._local = threading.local()
+        self._closed = False
+    
+    def _open(self) -> sqlite3.Connection:
+        """Open a read-only connection with the storage profile applied."""
+        if self.tracer is not None:
+            conn = self.tracer.connect(self.db_name, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        for pragma, value in self.profile.pragmas().items():
+            if pragma not in self.WRITER_PRAGMAS:
+                conn.execute(f"PRAGMA {pragma} = {value}")
+        conn.execute("PRAGMA query_only = 1")
+        return conn
+    
+    def checkout(self) -> sqlite3.Connection:
+        """Take an idle connection, opening one or waiting if none is free."""
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Connection pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if len(self._opened) < self.size:
+                    break
+                self._condition.wait()
+            conn = self._open()
+            self._opened.append(conn)
+            return conn
+    
+    def checkin(self, conn: sqlite3.Connection):
+        """Give a checked out connection back to the pool."""
+        with self._condition:
+            if self._closed:
+                conn.close()
+                return
+            self._idle.append(conn)
+            self._condition.notify()
+    
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection for the block, reusing the thread's own if it holds one."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+        
+        conn = self.checkout()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self.checkin(conn)
+    
+    def close(self):
+        """Close idle connections, the rest are closed when checked in."""
+        with self._condition:
+            self._closed = True
+            for conn in self._idle:
+                conn.close()
+            self._idle.clear()
+            self._condition.notify_all()
+
+
+class TaskCache:
+    """Identity map of the Task records read from the database.
+    
+    Each task is held once, so reading it again hands back the same
+    record instead of building a new one. Results of task queries are
+    kept as lists of ids and statistics until a task becomes overdue, so
+    repeating a read costs no SQL while nothing has been written.
+    
+    Writes reach the cache once committed: changed tasks are replaced,
+    deleted ones dropped and query results cleared. Every write moves
+    the generation on, and a read only stores what it read if the
+    generation did not move while it ran. The least recently used tasks
+    are evicted once more than max_tasks are held or their descriptions
+    add up to more than max_description_chars.
+    """
+    
+    def __init__(self, max_tasks: int = 20000, max_description_chars: int = 4 * 1024 * 1024,
+                 max_queries: int = 128):
+        self.max_tasks = max_tasks
+        self.max_description_chars = max_description_chars
+        self.max_queries = max_queries
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._tasks = OrderedDict()  # id -> Task, least recently used first
+        self._description_chars = 0
+        self._queries = OrderedDict()  # key -> task ids
+        self._statistics = None  # (valid_until, statistics)
+    
+    def __len__(self) -> int:
+        return len(self._tasks)
+    
+    def get(self, task_id: int) -> Optional[Task]:
+        """Get a cached task, or None."""
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                self.misses += 1
+                return None
+            self._tasks.move_to_end(task_id)
+            self.hits += 1
+            return task
+    
+    def query(self, key: tuple) -> Optional[List[Task]]:
+        """Get the cached result of a query, or None."""
+        with self._lock:
+            ids = self._queries.get(key)
+            tasks = None if ids is None else [self._tasks.get(task_id) for task_id in ids]
+            if tasks is None or None in tasks:
+                # Not run yet, or some of its tasks have been evicted
+                self._queries.pop(key, None)
+                self.misses += 1
+                return None
+            
+            self._queries.move_to_end(key)
+            for task_id in ids:
+                self._tasks.move_to_end(task_id)
+            self.hits += 1
+            return tasks
+    
+    def store(self, generation: int, columns: tuple, rows: List[tuple],
+              key: tuple = None) -> List[Task]:
+        """Turn rows read at generation into tasks and cache them.
+        
+        Tasks already cached are reused. With a key the result is cached
+        as that query's result.
+        """
+        id_column = columns.index('id')
+        with self._lock:
+            if generation != self.generation:
+                # A write happened meanwhile, the rows may be out of date
+                return [Task.from_row(columns, row) for row in rows]
+            
+            tasks = []
+            for row in rows:
+                task = self._tasks.get(row[id_column])
+                if task is None:
+                    task = Task.from_row(columns, row)
+                    self._add(task)
+                else:
+                    self._tasks.move_to_end(task.id)
+                tasks.append(task)
+            
+            if key is not None and len(tasks) <= self.max_tasks:
+                self._queries[key] = [task.id for task in tasks]
+                while len(self._queries) > self.max_queries:
+                    self._queries.popitem(last=False)
+            self._evict()
+            return tasks
+    
+    def statistics(self, now: int) -> Optional[Dict]:
+        """Get the statistics cached if they are still valid at now, or None."""
+        with self._lock:
+            if self._statistics is not None:
+                valid_until, statistics = self._statistics
+                if valid_until is None or now <= valid_until:
+                    self.hits += 1
+                    return statistics
+            self.misses += 1
+            return None
+    
+    def store_statistics(self, generation: int, valid_until: Optional[int], statistics: Dict):
+        """Cache statistics read at generation, valid up to valid_until or for good."""
+        with self._lock:
+            if generation == self.generation:
+                self._statistics = (valid_until, statistics)
+    
+    def _add(self, task: Task):
+        """Hold a task, replacing the one with its id."""
+        old = self._tasks.pop(task.id, None)
+        if old is not None:
+            self._description_chars -= len(old.description or "")
+        self._tasks[task.id] = task
+        self._description_chars += len(task.description or "")
+    
+    def _evict(self):
+        """Drop least recently used tasks until the cache is within bounds."""
+        while self._tasks and (len(self._tasks) > self.max_tasks
+                               or self._description_chars > self.max_description_chars):
+            _, task = self._tasks.popitem(last=False)
+            self._description_chars -= len(task.description or "")
+    
+    def _changed(self):
+        """Move to a new generation, dropping results that may be out of date."""
+        self.generation += 1
+        self._queries.clear()
+        self._statistics = None
+    
+    def changed(self):
+        """Note a write that changed tasks the cache does not know about."""
+        with self._lock:
+            self._changed()
+    
+    def put(self, task: Task):
+        """Cache a task that was added."""
+        with self._lock:
+            self._changed()
+            self._add(task)
+            self._evict()
+    
+    def update(self, changes: Dict[int, Dict]):
+        """Replace cached tasks with their changed versions."""
+        with self._lock:
+            self._changed()
+            for task_id, task_changes in changes.items():
+                task = self._tasks.get(task_id)
+                if task is not None:
+                    # SQLite stores booleans as integers
+                    task_changes = {key: int(value) if isinstance(value, bool) else value
+                                    for key, value in task_changes.items()}
+                    self._add(task.replace(**task_changes))
+            self._evict()
+    
+    def discard(self, task_ids: Iterable[int]):
+        """Drop deleted tasks."""
+        with self._lock:
+            self._changed()
+            for task_id in task_ids:
+                task = self._tasks.pop(task_id, None)
+                if task is not None:
+                    self._description_chars -= len(task.description or "")
+    
+    def discard_where(self, predicate: Callable[[Task], bool]):
+        """Drop the deleted tasks matching predicate."""
+        with self._lock:
+            ids = [task.id for task in self._tasks.values() if predicate(task)]
+        self.discard(ids)
+    
+    def clear(self):
+        """Drop everything."""
+        with self._lock:
+            self._changed()
+            self._tasks.clear()
+            self._description_chars = 0
+
+
+class OperationCancelled(Exception):
+    """Raised when a long-running operation is cancelled by its caller."""
+
+
+@profile_methods('database')
 class DatabaseManager:
-    def __init__(self, db_name: str = "tasks.db"):
-        """Initialize database connection and create tables if they don't exist."""
-        self.conn = sqlite3.connect(db_name)
+    # Indexes managed by create_tables, name -> definition
+    INDEXES = {
+        # Task lists: WHERE completed = ? ORDER BY priority, due_ts, id
+        'idx_tasks_completed_priority_due_ts':
+            "ON tasks (completed, priority, due_ts)",
+        # Task lists filtered by category
+        'idx_tasks_category_id_completed_priority_due_ts':
+            "ON tasks (category_id, completed, priority, due_ts)",
+        # Overdue count, a range over pending due times only
+        'idx_tasks_pending_due_ts':
+            "ON tasks (due_ts) WHERE completed = 0",
+    }
+    
+    # Indexes of earlier versions, dropped by create_tables
+    RETIRED_INDEXES = (
+        'idx_tasks_completed_priority_due',
+        'idx_tasks_category_completed',
+        'idx_tasks_pending_due',
+        'idx_tasks_category_completed_due_ts',
+        'idx_tasks_category_id_completed_due_ts',
+    )
+    
+    TASKS_ORDER = "ORDER BY priority ASC, due_ts ASC, id ASC"
+    
+    # Tasks table, tasks name their category by id
+    TASKS_TABLE = '''
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            priority INTEGER DEFAULT 2,  -- 1: High, 2: Medium, 3: Low
+            due_date TEXT,
+            completed BOOLEAN DEFAULT 0,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            due_ts INTEGER,  -- due_date as seconds since the epoch
+            category_id INTEGER REFERENCES categories (id)
+        )
+    '''
+    
+    # Per-category counts kept exact by the task_counts triggers
+    COUNTS_QUERY = '''
+        SELECT IFNULL(categories.name, ''), pending, completed, high_priority
+        FROM task_counts LEFT JOIN categories ON categories.id = task_counts.category_id
+    '''
+    
+    # Overdue depends on the current time, so it is counted over an index range
+    OVERDUE_QUERY = '''
+        SELECT COUNT(*) FROM tasks INDEXED BY idx_tasks_pending_due_ts
+        WHERE completed = 0 AND due_ts < ?
+    '''
+    
+    # The next time a pending task becomes overdue
+    NEXT_DUE_QUERY = '''
+        SELECT MIN(due_ts) FROM tasks INDEXED BY idx_tasks_pending_due_ts
+        WHERE completed = 0 AND due_ts >= ?
+    '''
+    
+    SEARCH_QUERY = '''
+        SELECT task_rows.* FROM tasks_fts
+        JOIN task_rows ON task_rows.id = tasks_fts.rowid
+        WHERE tasks_fts MATCH ?
+        ORDER BY bm25(tasks_fts)
+        LIMIT ?
+    '''
+    
+    # Search without the search index, matched by LIKE over every task
+    SEARCH_FALLBACK_QUERY = f'''
+        SELECT * FROM task_rows
+        WHERE title LIKE ? OR description LIKE ? OR category LIKE ?
+        {TASKS_ORDER}
+        LIMIT ?
+    '''
+    
+    TASK_QUERY = "SELECT * FROM task_rows WHERE id = ?"
+    
+    INSERT_TASK_QUERY = '''
+        INSERT INTO tasks (title, description, priority, due_date, completed,
+                          created_at, updated_at, due_ts, category_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    DELETE_TASK_QUERY = "DELETE FROM tasks WHERE id = ?"
+    DELETE_COMPLETED_QUERY = "DELETE FROM tasks WHERE completed = 1"
+    
+    CATEGORIES_QUERY = "SELECT * FROM categories ORDER BY name"
+    # Loads the category registry
+    CATEGORY_IDS_QUERY = "SELECT id, name, color FROM categories"
+    ADD_CATEGORY_QUERY = "INSERT OR IGNORE INTO categories (name, color) VALUES (?, ?)"
+    NEW_CATEGORY_QUERY = "INSERT INTO categories (name, color) VALUES (?, ?)"
+    
+    EXPORT_TOTAL_QUERY = "SELECT IFNULL(SUM(pending + completed), 0) FROM task_counts"
+    EXPORT_TASKS_QUERY = "SELECT * FROM task_rows ORDER BY id"
+    
+    # Plan steps that are expected even though they look like scans or sorts
+    EXPECTED_PLAN_STEPS = (
+        'SCAN categories',  # small table, always read whole
+        'SCAN task_counts',  # one row per category
+        'SCAN tasks_fts VIRTUAL TABLE',  # FTS5 index lookup
+        'SCAN CONSTANT ROW',  # wrapper of scalar subqueries
+    )
+    # Queries reading every task, which scan the table by design
+    FULL_READ_QUERIES = ('export', 'search_fallback')
+    
+    READ_CONNECTIONS = 4
+    
+    def __init__(self, db_name: str = "tasks.db",
+                 profile: Union[StorageProfile, str] = "durable", tracer: SqlTracer = None):
+        """Initialize database connection and create tables if they don't exist.
+        
+        With a tracer, or TASKMANAGER_SQL_TRACE set, every statement is
+        traced, see sqltrace.py.
+        """
+        if isinstance(profile, str):
+            profile = STORAGE_PROFILES[profile]
+        self.db_name = db_name
+        self.profile = profile
+        self.tracer = tracer if tracer is not None else sqltrace.tracer
+        self.conn = self.connect()
+        self.fts_enabled = False
+        self._batch_depth = 0
+        self.cache = TaskCache()
+        self._cache_updates = []  # applied to the cache once committed
+        self.categories = CategoryRegistry()  # writer connection only
         self.create_tables()
+        # An in-memory database exists only on the writer connection
+        if db_name == ':memory:':
+            self.readers = None
+        else:
+            self.readers = ConnectionPool(db_name, profile, self.READ_CONNECTIONS, self.tracer)
+    
+    def connect(self) -> sqlite3.Connection:
+        """Open a connection to the database with the storage profile applied."""
+        if self.tracer is not None:
+            conn = self.tracer.connect(self.db_name)
+        else:
+            conn = sqlite3.connect(self.db_name)
+        for pragma, value in self.profile.pragmas().items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        return conn
+    
+    def effective_pragmas(self) -> Dict:
+        """Get the pragma values SQLite actually uses for the connection."""
+        effective = {}
+        for pragma in self.profile.pragmas():
+            # Pragmas that do not apply, like mmap_size in memory, return no row
+            row = self.conn.execute(f"PRAGMA {pragma}").fetchone()
+            effective[pragma] = row[0] if row else None
+        return effective
+    
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Get a connection for reading, from the pool if there is one."""
+        if self.readers is None:
+            yield self.conn
+        else:
+            with self.readers.connection() as conn:
+                yield conn
+    
+    def _fetch(self, query: str, params=()) -> List[Dict]:
+        """Run a read query and get its rows as dicts."""
+        with span('sql', 'database'), self.reader() as conn:
+            cursor = conn.execute(query, params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def _fetch_tasks(self, key: Optional[tuple], queries, limit: int = None) -> List[Task]:
+        """Run task queries and get their rows as tasks, from the cache if it has them.
+        
+        queries are (query, params) pairs run in turn. With a limit each
+        query takes the number of rows still missing as its last parameter.
+        """
+        if key is not None:
+            tasks = self.cache.query(key)
+            if tasks is not None:
+                return tasks
+        
+        generation = self.cache.generation
+        columns = None
+        rows = []
+        with span('sql', 'database'), self.reader() as conn:
+            for query, params in queries:
+                if limit is not None:
+                    if len(rows) >= limit:
+                        break
+                    params = list(params) + [limit - len(rows)]
+                cursor = conn.execute(query, params)
+                columns = tuple(column[0] for column in cursor.description)
+                rows.extend(cursor.fetchall())
+        
+        if columns is None:
+            return []
+        with span('build tasks', 'database'):
+            return self.cache.store(generation, columns, rows, key)
     
     def create_tables(self):
         """Create necessary tables for the application."""
         cursor = self.conn.cursor()
         
-        # Tasks table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT,
-                priority INTEGER DEFAULT 2,  -- 1: High, 2: Medium, 3: Low
-                due_date TEXT,
-                completed BOOLEAN DEFAULT 0,
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL,
-                category TEXT DEFAULT 'General'
-            )
-        ''')
-        
         # Categories table
-        cursor.execute('''
+        cursor.execute(f'''
             CREATE TABLE IF NOT EXISTS categories (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT UNIQUE NOT NULL,
-                color TEXT DEFAULT '#3498db'
+                color TEXT DEFAULT '{DEFAULT_CATEGORY_COLOR}'
             )
         ''')
         
         # Insert default categories if they don't exist
-        default_categories = [
-            ('General', '#3498db'),
-            ('Work', '#e74c3c'),
-            ('Personal', '#2ecc71'),
-            ('Shopping', '#f39c12'),
-            ('Health', '#9b59b6'),
-            ('Finance', '#1abc9c')
-        ]
+        cursor.executemany('''
+            INSERT OR IGNORE INTO categories (name, color) VALUES (?, ?)
+        ''', DEFAULT_CATEGORIES.items())
         
-        for category, color in default_categories:
-            cursor.execute('''
-                INSERT OR IGNORE INTO categories (name, color) VALUES (?, ?)
-            ''', (category, color))
+        # Tasks table
+        cursor.execute(self.TASKS_TABLE.format(name='tasks'))
+        self.add_due_timestamps(cursor)
+        self.add_category_ids(cursor)
+        
+        # Tasks as they are read, with the name of their category
+        cursor.execute('''
+            CREATE VIEW IF NOT EXISTS task_rows AS
+            SELECT tasks.id, title, description, priority, due_date, completed,
+                   created_at, updated_at, categories.name AS category, due_ts, category_id
+            FROM tasks LEFT JOIN categories ON categories.id = tasks.category_id
+        ''')
+        
+        self.create_indexes(cursor)
+        self.create_counters(cursor)
+        self.create_search_index(cursor)
         
         self.conn.commit()
     
+    def add_due_timestamps(self, cursor):
+        """Add the due_ts column to tasks tables created without it and fill it."""
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(tasks)")]
+        if 'due_ts' in columns:
+            return
+        
+        cursor.execute("ALTER TABLE tasks ADD COLUMN due_ts INTEGER")
+        self.conn.create_function('due_timestamp', 1, due_timestamp, deterministic=True)
+        cursor.execute(
+            "UPDATE tasks SET due_ts = due_timestamp(due_date) WHERE due_date IS NOT NULL"
+        )
+    
+    def add_category_ids(self, cursor):
+        """Move tasks tables naming categories by name to category ids.
+        
+        The table is rebuilt without its category column, which works on
+        SQLite versions without ALTER TABLE DROP COLUMN. The tables derived
+        from the category names, the counters and the search index, are
+        dropped and rebuilt from the ids afterwards.
+        """
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(tasks)")]
+        if 'category' not in columns:
+            return
+        
+        # Left over by a migration that did not commit
+        cursor.execute("DROP TABLE IF EXISTS tasks_migrated")
+        cursor.execute(self.TASKS_TABLE.format(name='tasks_migrated'))
+        
+        # From the first write on, the migration is one transaction
+        cursor.execute('''
+            INSERT OR IGNORE INTO categories (name)
+            SELECT DISTINCT category FROM tasks WHERE category IS NOT NULL AND category != ''
+        ''')
+        cursor.execute('''
+            INSERT INTO tasks_migrated (id, title, description, priority, due_date, completed,
+                                        created_at, updated_at, due_ts, category_id)
+            SELECT id, title, description, priority, due_date, completed,
+                   created_at, updated_at, due_ts,
+                   (SELECT id FROM categories WHERE name = tasks.category)
+            FROM tasks
+        ''')
+        # Ids of deleted tasks are not handed out again
+        row = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'tasks'").fetchone()
+        
+        # Indexes and triggers of the old table go with it
+        cursor.execute("DROP TABLE tasks")
+        cursor.execute("ALTER TABLE tasks_migrated RENAME TO tasks")
+        if row is not None:
+            cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'tasks'",
+                           row)
+        cursor.execute("DROP TABLE IF EXISTS task_counts")
+        cursor.execute("DROP TABLE IF EXISTS tasks_fts")
+    
+    def create_indexes(self, cursor):
+        """Create the managed index set on the tasks table."""
+        for name in self.RETIRED_INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        for name, definition in self.INDEXES.items():
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} {definition}")
+    
+    def create_counters(self, cursor):
+        """Create the task_counts table and the triggers keeping it exact."""
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'task_counts'"
+        )
+        counters_exist = cursor.fetchone() is not None
+        
+        # Tasks without a category are counted under category id 0
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS task_counts (
+                category_id INTEGER PRIMARY KEY,
+                pending INTEGER NOT NULL DEFAULT 0,
+                completed INTEGER NOT NULL DEFAULT 0,
+                high_priority INTEGER NOT NULL DEFAULT 0  -- pending only
+            )
+        ''')
+        
+        add_new = '''
+            INSERT OR IGNORE INTO task_counts (category_id) VALUES (IFNULL(new.category_id, 0));
+            UPDATE task_counts SET
+                pending = pending + (new.completed = 0),
+                completed = completed + (new.completed = 1),
+                high_priority = high_priority + (new.completed = 0 AND new.priority = 1)
+            WHERE category_id = IFNULL(new.category_id, 0);
+        '''
+        remove_old = '''
+            UPDATE task_counts SET
+                pending = pending - (old.completed = 0),
+                completed = completed - (old.completed = 1),
+                high_priority = high_priority - (old.completed = 0 AND old.priority = 1)
+            WHERE category_id = IFNULL(old.category_id, 0);
+        '''
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS task_counts_insert AFTER INSERT ON tasks BEGIN
+                {add_new}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS task_counts_delete AFTER DELETE ON tasks BEGIN
+                {remove_old}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS task_counts_update
+            AFTER UPDATE OF completed, priority, category_id ON tasks BEGIN
+                {remove_old}
+                {add_new}
+            END
+        ''')
+        
+        # Count tasks that existed before the counters were created
+        if not counters_exist:
+            cursor.execute('''
+                INSERT INTO task_counts (category_id, pending, completed, high_priority)
+                SELECT IFNULL(category_id, 0),
+                       SUM(completed = 0), SUM(completed = 1),
+                       SUM(completed = 0 AND priority = 1)
+                FROM tasks GROUP BY IFNULL(category_id, 0)
+            ''')
+    
+    def create_search_index(self, cursor):
+        """Create the FTS5 search index over tasks and its sync triggers.
+        
+        The index reads its content from the task_rows view, so category
+        names are indexed without being stored in the tasks table.
+        """
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+        )
+        index_exists = cursor.fetchone() is not None
+        
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+                    title, description, category,
+                    content='task_rows', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            # SQLite was built without FTS5, search falls back to LIKE
+            self.fts_enabled = False
+            return
+        
+        # Keep the index in sync with the tasks table
+        new_category = "(SELECT name FROM categories WHERE id = new.category_id)"
+        old_category = "(SELECT name FROM categories WHERE id = old.category_id)"
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+                INSERT INTO tasks_fts (rowid, title, description, category)
+                VALUES (new.id, new.title, new.description, {new_category});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, title, description, category)
+                VALUES ('delete', old.id, old.title, old.description, {old_category});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS tasks_fts_update
+            AFTER UPDATE OF title, description, category_id ON tasks BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, title, description, category)
+                VALUES ('delete', old.id, old.title, old.description, {old_category});
+                INSERT INTO tasks_fts (rowid, title, description, category)
+                VALUES (new.id, new.title, new.description, {new_category});
+            END
+        ''')
+        
+        # Index tasks that existed before the search index was created
+        if not index_exists:
+            cursor.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+        
+        self.fts_enabled = True
+    
     def add_task(self, title: str, description: str = "", priority: int = 2,
                  due_date: str = None, category: str = "General") -> int:
         """Add a new task to the database."""
         cursor = self.conn.cursor()
         current_time = datetime.now().isoformat()
+        due_ts = due_timestamp(due_date)
+        category_id = self.category_id(category)
         
-        cursor.execute('''
-            INSERT INTO tasks (title, description, priority, due_date, 
-                              created_at, updated_at, category)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (title, description, priority, due_date, 
-              current_time, current_time, category))
+        cursor.execute(self.INSERT_TASK_QUERY, (title, description, priority, due_date, 0,
+                                                current_time, current_time, due_ts, category_id))
         
-        self.conn.commit()
-        return cursor.lastrowid
+        task = Task(cursor.lastrowid, title, description, priority, due_date, 0,
+                    current_time, current_time, category, due_ts, category_id)
+        self._cache_updates.append(lambda: self.cache.put(task))
+        self._commit()
+        return task.id
     
-    def get_tasks(self, completed: bool = False, category: str = None) -> List[Dict]:
-        """Retrieve tasks from database with optional filters."""
-        cursor = self.conn.cursor()
+    def _commit(self):
+        """Commit the current transaction unless a batch is open."""
+        if self._batch_depth == 0:
+            self.conn.commit()
+            self._update_cache()
+    
+    def _update_cache(self):
+        """Apply the cache updates of the writes just committed."""
+        updates, self._cache_updates = self._cache_updates, []
+        for update in updates:
+            update()
+    
+    @contextmanager
+    def batch(self):
+        """Group writes into a single transaction.
+        
+        Per-call commits are suspended inside the block. The transaction
+        is committed when the outermost batch exits, or rolled back if it
+        raises.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.conn.rollback()
+                self._cache_updates = []
+                # It may hold categories added by the rolled back writes
+                self.categories.invalidate()
+            raise
+        
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.conn.commit()
+            self._update_cache()
+    
+    def add_tasks(self, tasks: Iterable[Dict]) -> int:
+        """Add many tasks in one transaction and return how many were added.
         
-        query = "SELECT * FROM tasks WHERE completed = ?"
+        Each task is a dict with the add_task arguments as keys, and
+        optionally whether it is completed. Categories that do not exist
+        yet are added.
+        """
+        current_time = datetime.now().isoformat()
+        tasks = list(tasks)
+        
+        with self.batch():
+            # Categories are added before the insert starts reading rows
+            category_ids = {name: self.category_id(name)
+                            for name in {task.get('category', "General") for task in tasks}}
+            rows = (
+                (task['title'], task.get('description', ""), task.get('priority', 2),
+                 task.get('due_date'), task.get('completed', False),
+                 current_time, current_time, due_timestamp(task.get('due_date')),
+                 category_ids[task.get('category', "General")])
+                for task in tasks
+            )
+            cursor = self.conn.cursor()
+            cursor.executemany(self.INSERT_TASK_QUERY, rows)
+            self._cache_updates.append(self.cache.changed)
+            return cursor.rowcount
+    
+    def _task_filter(self, completed: bool, category: str = None):
+        """Build WHERE clause and parameters for task list queries."""
+        where = "completed = ?"
         params = [1 if completed else 0]
         
         if category and category != "All":
-            query += " AND category = ?"
+            where += " AND category_id = (SELECT id FROM categories WHERE name = ?)"
             params.append(category)
         
-        query += " ORDER BY priority ASC, due_date ASC"
+        return where, params
+    
+    def get_tasks(self, completed: bool = False, category: str = None) -> List[Task]:
+        """Retrieve tasks from database with optional filters."""
+        where, params = self._task_filter(completed, category)
+        query = f"SELECT * FROM task_rows WHERE {where} {self.TASKS_ORDER}"
         
-        cursor.execute(query, params)
-        columns = [column[0] for column in cursor.description]
-        tasks = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return self._fetch_tasks(('tasks', completed, category), [(query, params)])
+    
+    def iter_tasks(self, completed: bool = False, category: str = None,
+                   after: tuple = None, limit: int = 200) -> List[Task]:
+        """Retrieve one page of tasks in get_tasks order.
+        
+        after is the (priority, due_ts, id) key of the last task of the
+        previous page. Pages are found with an index seek on that key, so
+        fetching a page costs the same no matter how deep it is.
+        """
+        return self._fetch_tasks(('page', completed, category, after, limit),
+                                 self._page_queries(completed, category, after), limit)
+    
+    def _page_queries(self, completed: bool, category: str, after: tuple):
+        """Build the queries for a page of tasks, each taking a LIMIT parameter last."""
+        where, params = self._task_filter(completed, category)
+        
+        if after is None:
+            clauses = [("", [])]
+        elif after[1] is None:
+            priority, _, task_id = after
+            # Tasks without a due date come first within a priority
+            clauses = [
+                (" AND priority = ? AND due_ts IS NULL AND id > ?", [priority, task_id]),
+                (" AND (priority, due_ts, id) > (?, ?, 0)", [priority, -2 ** 63])
+            ]
+        else:
+            clauses = [(" AND (priority, due_ts, id) > (?, ?, ?)", list(after))]
+        
+        return [
+            (f"SELECT * FROM task_rows WHERE {where}{clause} {self.TASKS_ORDER} LIMIT ?",
+             params + clause_params)
+            for clause, clause_params in clauses
+        ]
+    
+    def stream_tasks(self, completed: bool = False, category: str = None,
+                     chunk_size: int = 1000) -> Iterator[List[Task]]:
+        """Yield tasks in get_tasks order as chunks of at most chunk_size."""
+        after = None
+        while True:
+            tasks = self.iter_tasks(completed, category, after=after, limit=chunk_size)
+            if tasks:
+                yield tasks
+            if len(tasks) < chunk_size:
+                return
+            
+            last = tasks[-1]
+            after = (last['priority'], last['due_ts'], last['id'])
+    
+    def get_task(self, task_id: int) -> Optional[Task]:
+        """Retrieve a single task by id."""
+        task = self.cache.get(task_id)
+        if task is not None:
+            return task
         
-        return tasks
+        tasks = self._fetch_tasks(None, [(self.TASK_QUERY, (task_id,))])
+        return tasks[0] if tasks else None
     
     def update_task(self, task_id: int, **kwargs):
         """Update task attributes."""
@@ -99,61 +906,596 @@ class DatabaseManager:
         
         cursor = self.conn.cursor()
         current_time = datetime.now().isoformat()
+        kwargs = self._derived_changes(kwargs)
         kwargs['updated_at'] = current_time
+        columns = [key for key in kwargs if key != 'category']
         
-        set_clause = ', '.join([f"{key} = ?" for key in kwargs.keys()])
-        values = list(kwargs.values())
+        values = [kwargs[key] for key in columns]
         values.append(task_id)
         
-        cursor.execute(f'''
-            UPDATE tasks SET {set_clause} WHERE id = ?
-        ''', values)
+        cursor.execute(self._update_query(columns), values)
         
-        self.conn.commit()
+        self._cache_updates.append(lambda: self.cache.update({task_id: kwargs}))
+        self._commit()
+    
+    def update_tasks(self, changes: Dict[int, Dict]):
+        """Update many tasks in one transaction.
+        
+        changes maps task id to the attributes to update. Tasks changing
+        the same set of attributes share one executemany call.
+        """
+        current_time = datetime.now().isoformat()
+        
+        groups = {}
+        updated = {}  # changes as written, for the cache
+        with self.batch():
+            for task_id, task_changes in changes.items():
+                if not task_changes:
+                    continue
+                task_changes = self._derived_changes(task_changes)
+                columns = tuple(sorted(key for key in task_changes if key != 'category'))
+                values = [task_changes[column] for column in columns]
+                groups.setdefault(columns, []).append(values + [current_time, task_id])
+                updated[task_id] = dict(task_changes, updated_at=current_time)
+            
+            cursor = self.conn.cursor()
+            for columns, rows in groups.items():
+                cursor.executemany(self._update_query(columns + ('updated_at',)), rows)
+            self._cache_updates.append(lambda: self.cache.update(updated))
+    
+    @staticmethod
+    def _update_query(columns: Iterable[str]) -> str:
+        """Build the UPDATE of task columns, taking the task id as its last parameter."""
+        set_clause = ', '.join([f"{key} = ?" for key in columns])
+        return f"UPDATE tasks SET {set_clause} WHERE id = ?"
+    
+    def _derived_changes(self, changes: Dict) -> Dict:
+        """Add the columns derived from changed fields to task changes.
+        
+        A due_date change sets due_ts, and a category change, which names
+        the category, sets category_id.
+        """
+        if 'due_date' in changes:
+            changes = dict(changes, due_ts=due_timestamp(changes['due_date']))
+        if 'category' in changes:
+            changes = dict(changes, category_id=self.category_id(changes['category']))
+        return changes
     
     def delete_task(self, task_id: int):
         """Delete a task from database."""
         cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-        self.conn.commit()
+        cursor.execute(self.DELETE_TASK_QUERY, (task_id,))
+        self._cache_updates.append(lambda: self.cache.discard([task_id]))
+        self._commit()
+    
+    def delete_tasks(self, task_ids: Iterable[int]):
+        """Delete many tasks in one transaction."""
+        task_ids = list(task_ids)
+        with self.batch():
+            cursor = self.conn.cursor()
+            cursor.executemany(self.DELETE_TASK_QUERY, ((task_id,) for task_id in task_ids))
+            self._cache_updates.append(lambda: self.cache.discard(task_ids))
+    
+    def apply_edits(self, updates: Dict[int, Dict], deletes: Iterable[int]):
+        """Apply queued updates and deletions in one transaction."""
+        with self.batch():
+            self.update_tasks(updates)
+            self.delete_tasks(deletes)
+    
+    def delete_completed_tasks(self):
+        """Delete all completed tasks."""
+        cursor = self.conn.cursor()
+        cursor.execute(self.DELETE_COMPLETED_QUERY)
+        self._cache_updates.append(
+            lambda: self.cache.discard_where(lambda task: task.completed == 1))
+        self._commit()
+    
+    @staticmethod
+    def build_match_query(query: str) -> str:
+        """Build an FTS5 prefix query matching all words of the search text."""
+        words = re.findall(r"\w+", query)
+        return ' '.join(f'"{word}"*' for word in words)
+    
+    def search(self, query: str, limit: int = 200) -> List[Task]:
+        """Search tasks by title, description and category, best matches first."""
+        key = ('search', query, limit)
+        if self.fts_enabled:
+            match_query = self.build_match_query(query)
+            if not match_query:
+                return []
+            
+            return self._fetch_tasks(key, [(self.SEARCH_QUERY, (match_query, limit))])
+        
+        pattern = f"%{query.strip()}%"
+        return self._fetch_tasks(
+            key, [(self.SEARCH_FALLBACK_QUERY, (pattern, pattern, pattern, limit))])
     
     def get_categories(self) -> List[Dict]:
         """Get all categories."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM categories ORDER BY name")
-        columns = [column[0] for column in cursor.description]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return self._fetch(self.CATEGORIES_QUERY)
     
-    def add_category(self, name: str, color: str = "#3498db"):
+    def add_category(self, name: str, color: str = DEFAULT_CATEGORY_COLOR):
         """Add a new category."""
         cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT OR IGNORE INTO categories (name, color) VALUES (?, ?)
-        ''', (name, color))
-        self.conn.commit()
+        cursor.execute(self.ADD_CATEGORY_QUERY, (name, color))
+        self.categories.invalidate()
+        self._commit()
+    
+    def category_id(self, name: Optional[str]) -> Optional[int]:
+        """Get the id of a category, adding the category if it is new.
+        
+        Tasks without a category name have no category id. Ids come from
+        the category registry, loaded from the writer connection the
+        first time one is needed.
+        """
+        if not name:
+            return None
+        if not self.categories.loaded:
+            cursor = self.conn.execute(self.CATEGORY_IDS_QUERY)
+            self.categories.load({'id': row[0], 'name': row[1], 'color': row[2]}
+                                 for row in cursor)
+        
+        category_id = self.categories.id_of(name)
+        if category_id is None:
+            cursor = self.conn.execute(self.NEW_CATEGORY_QUERY, (name, DEFAULT_CATEGORY_COLOR))
+            category_id = cursor.lastrowid
+            self.categories.add(Category(category_id, name, DEFAULT_CATEGORY_COLOR))
+        return category_id
     
     def get_task_statistics(self) -> Dict:
-        """Get task statistics for dashboard."""
-        cursor = self.conn.cursor()
+        """Get task statistics for dashboard.
         
-        cursor.execute('''
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN completed = 1 THEN 1 ELSE 0 END) as completed,
-                SUM(CASE WHEN priority = 1 AND completed = 0 THEN 1 ELSE 0 END) as high_priority,
-                SUM(CASE WHEN due_date IS NOT NULL AND due_date < date('now') AND completed = 0 THEN 1 ELSE 0 END) as overdue
-            FROM tasks
-        ''')
+        Counts are read from the task_counts table instead of scanning
+        tasks, only overdue tasks are counted, over an index range. Counts
+        per category are under 'categories', and the next time a pending
+        task becomes due under 'next_due'.
+        """
+        # Overdue means due before the current time, due_ts < ceil(t) is due_ts < t
+        now = math.ceil(time.time())
+        statistics = self.cache.statistics(now)
+        if statistics is not None:
+            return statistics
+        
+        generation = self.cache.generation
+        with self.reader() as conn:
+            counts = conn.execute(self.COUNTS_QUERY).fetchall()
+            overdue = conn.execute(self.OVERDUE_QUERY, (now,)).fetchone()[0]
+            # The overdue count holds until the next pending task is due
+            next_due = conn.execute(self.NEXT_DUE_QUERY, (now,)).fetchone()[0]
         
-        stats = cursor.fetchone()
+        pending = completed = high_priority = 0
+        categories = {}
+        for category, category_pending, category_completed, category_high in counts:
+            pending += category_pending
+            completed += category_completed
+            high_priority += category_high
+            if category_pending or category_completed:
+                categories[category] = {
+                    'total': category_pending + category_completed,
+                    'completed': category_completed,
+                    'high_priority': category_high,
+                    'pending': category_pending
+                }
+        
+        statistics = {
+            'total': pending + completed,
+            'completed': completed,
+            'high_priority': high_priority,
+            'overdue': overdue,
+            'pending': pending,
+            'categories': categories,
+            'next_due': next_due
+        }
+        self.cache.store_statistics(generation, next_due, statistics)
+        return statistics
+    
+    EXPORT_FORMATS = ('jsonl', 'csv')
+    
+    def export(self, path: str, fmt: str = None, chunk_size: int = 1000,
+               progress: Callable[[int, int], None] = None,
+               cancelled: Callable[[], bool] = None) -> int:
+        """Export categories and tasks to a file, returning the number of tasks.
+        
+        fmt is 'jsonl' or 'csv', taken from the file extension when not
+        given. A JSON Lines export holds both, one object per line with a
+        'record' key of 'category' or 'task'. A CSV export holds the tasks,
+        and the categories go to <name>.categories.csv next to it.
+        
+        Rows are streamed from one read snapshot in chunks of chunk_size,
+        so memory use does not grow with the database. After each chunk
+        progress(done, total) is called, and the export stops with
+        OperationCancelled if cancelled() returns true. Files are written
+        under a temporary name and only replace path when complete.
+        """
+        if fmt is None:
+            fmt = os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt not in self.EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt!r}")
+        
+        if fmt == 'csv':
+            categories_path = os.path.splitext(path)[0] + ".categories.csv"
+            targets = [path, categories_path]
+        else:
+            targets = [path]
+        
+        done = 0
+        try:
+            with self.reader() as conn, conn:
+                # One transaction, so every chunk reads the same snapshot
+                conn.execute("BEGIN")
+                total = conn.execute(self.EXPORT_TOTAL_QUERY).fetchone()[0]
+                categories = conn.execute(self.CATEGORIES_QUERY)
+                tasks = conn.execute(self.EXPORT_TASKS_QUERY)
+                
+                files = [open(target + ".part", 'w', newline='', encoding='utf-8')
+                         for target in targets]
+                try:
+                    if fmt == 'csv':
+                        write_tasks = self._csv_writer(files[0], tasks)
+                        write_categories = self._csv_writer(files[1], categories)
+                    else:
+                        write_tasks = self._jsonl_writer(files[0], tasks, 'task')
+                        write_categories = self._jsonl_writer(files[0], categories, 'category')
+                    
+                    write_categories(categories.fetchall())
+                    while True:
+                        if cancelled is not None and cancelled():
+                            raise OperationCancelled(f"Export to {path} cancelled")
+                        rows = tasks.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        write_tasks(rows)
+                        done += len(rows)
+                        if progress is not None:
+                            progress(done, total)
+                finally:
+                    for file in files:
+                        file.close()
+        except BaseException:
+            for target in targets:
+                if os.path.exists(target + ".part"):
+                    os.remove(target + ".part")
+            raise
+        
+        for target in targets:
+            os.replace(target + ".part", target)
+        return done
+    
+    @staticmethod
+    def _csv_writer(file, cursor: sqlite3.Cursor) -> Callable[[List[tuple]], None]:
+        """Write the header of cursor's columns and get a writer of its rows."""
+        writer = csv.writer(file)
+        writer.writerow([column[0] for column in cursor.description])
+        return writer.writerows
+    
+    @staticmethod
+    def _jsonl_writer(file, cursor: sqlite3.Cursor, record: str) -> Callable[[List[tuple]], None]:
+        """Get a writer of cursor's rows as JSON objects tagged with record."""
+        columns = [column[0] for column in cursor.description]
+        
+        def write(rows):
+            file.writelines(
+                json.dumps({'record': record, **dict(zip(columns, row))}) + "\n"
+                for row in rows
+            )
+        return write
+    
+    def import_tasks(self, path: str, fmt: str = None, batch_size: int = 5000,
+                     progress: Callable[[int, int], None] = None,
+                     cancelled: Callable[[], bool] = None) -> Dict:
+        """Import tasks from a JSON Lines or CSV file, as written by export().
+        
+        Records are parsed, validated and normalized one at a time and
+        inserted in batches of batch_size, each batch in one transaction.
+        Categories named by tasks are created when missing, category
+        records and <name>.categories.csv files set their colors. Task ids
+        in the file are not kept, imported tasks get new ones.
+        
+        After each batch progress(bytes_read, file_size) is called. Before
+        each batch, the last one included, the import stops with
+        OperationCancelled if cancelled() returns true. Batches written
+        before that stay imported. Returns the counts of
+        imported and skipped rows, the time taken and rows per second.
+        """
+        fmt = importer.import_format(path, fmt)
+        started = time.perf_counter()
+        imported = skipped = 0
+        
+        if fmt == 'csv':
+            categories_path = os.path.splitext(path)[0] + ".categories.csv"
+            if os.path.exists(categories_path):
+                with open(categories_path, newline='', encoding='utf-8-sig') as file:
+                    with self.batch():
+                        for row in csv.DictReader(file):
+                            if row.get('name'):
+                                self.add_category(row['name'],
+                                                  row.get('color') or DEFAULT_CATEGORY_COLOR)
+        
+        size = os.path.getsize(path)
+        with open(path, newline='', encoding='utf-8-sig') as file:
+            tasks = []
+            for kind, record in importer.read_records(file, fmt):
+                try:
+                    importer.validate(kind, record)
+                    if kind == 'category':
+                        self.add_category(record['name'],
+                                          record.get('color') or DEFAULT_CATEGORY_COLOR)
+                        continue
+                    tasks.append(importer.normalize(record))
+                except ValueError as error:
+                    logger.debug("Skipping record from %s: %s", path, error)
+                    skipped += 1
+                    continue
+                
+                if len(tasks) >= batch_size:
+                    if cancelled is not None and cancelled():
+                        raise OperationCancelled(
+                            f"Import from {path} cancelled after {imported} tasks")
+                    self.add_tasks(tasks)
+                    imported += len(tasks)
+                    tasks = []
+                    if progress is not None:
+                        progress(file.buffer.tell(), size)
+            
+            if tasks:
+                if cancelled is not None and cancelled():
+                    raise OperationCancelled(
+                        f"Import from {path} cancelled after {imported} tasks")
+                self.add_tasks(tasks)
+                imported += len(tasks)
+            if progress is not None:
+                progress(size, size)
+        
+        seconds = time.perf_counter() - started
         return {
-            'total': stats[0] or 0,
-            'completed': stats[1] or 0,
-            'high_priority': stats[2] or 0,
-            'overdue': stats[3] or 0,
-            'pending': (stats[0] or 0) - (stats[1] or 0)
+            'imported': imported,
+            'skipped': skipped,
+            'seconds': seconds,
+            'rows_per_second': imported / seconds if seconds > 0 else 0.0
         }
     
+    def explain_queries(self) -> List[Dict]:
+        """Run EXPLAIN QUERY PLAN on every query the manager issues.
+        
+        Queries are built from the same constants and helpers as the
+        methods running them. Returns one entry per query with its plan
+        steps and the steps flagged as problems: table scans and temporary
+        B-tree sorts.
+        """
+        def unbound(query):
+            # The plan does not depend on the parameter values
+            return [None] * query.count('?')
+        
+        after = (1, 946684800, 1)
+        queries = []
+        for category in (None, 'General'):
+            where, params = self._task_filter(False, category)
+            queries.append(('get_tasks',
+                            f"SELECT * FROM task_rows WHERE {where} {self.TASKS_ORDER}", params))
+            for key in (None, after, (after[0], None, after[2])):
+                for query, params in self._page_queries(False, category, key):
+                    queries.append(('iter_tasks', query, params + [1]))
+        
+        # Task edits set the checkbox state, or every field of the task dialog
+        updates = [('completed', 'updated_at'),
+                   ('category_id', 'description', 'due_date', 'due_ts', 'priority', 'title',
+                    'updated_at')]
+        for columns in updates:
+            queries.append(('update_tasks', self._update_query(columns), None))
+        
+        for name, query in (
+                ('get_task', self.TASK_QUERY),
+                ('add_tasks', self.INSERT_TASK_QUERY),
+                ('delete_tasks', self.DELETE_TASK_QUERY),
+                ('clear_completed', self.DELETE_COMPLETED_QUERY),
+                ('get_categories', self.CATEGORIES_QUERY),
+                ('category_id', self.CATEGORY_IDS_QUERY),
+                ('category_id', self.NEW_CATEGORY_QUERY),
+                ('add_category', self.ADD_CATEGORY_QUERY),
+                ('get_task_statistics', self.COUNTS_QUERY),
+                ('get_task_statistics', self.OVERDUE_QUERY),
+                ('get_task_statistics', self.NEXT_DUE_QUERY),
+                ('export', self.EXPORT_TOTAL_QUERY),
+                ('export', self.EXPORT_TASKS_QUERY),
+                ('search_fallback', self.SEARCH_FALLBACK_QUERY)):
+            queries.append((name, query, None))
+        if self.fts_enabled:
+            queries.append(('search', self.SEARCH_QUERY, None))
+        
+        cursor = self.conn.cursor()
+        report = []
+        for name, query, params in queries:
+            cursor.execute("EXPLAIN QUERY PLAN " + query,
+                           unbound(query) if params is None else params)
+            steps = [row[3] for row in cursor.fetchall()]
+            problems = [
+                step for step in steps
+                if (step.startswith('SCAN') or 'TEMP B-TREE' in step)
+                and not step.startswith(self.EXPECTED_PLAN_STEPS)
+            ]
+            if name in self.FULL_READ_QUERIES:
+                problems = [step for step in problems if not step.startswith('SCAN tasks')]
+            # Search results are sorted by rank, or by the task order after a full read
+            if name.startswith('search'):
+                problems = [step for step in problems if 'ORDER BY' not in step]
+            report.append({'name': name, 'query': ' '.join(query.split()),
+                           'plan': steps, 'problems': problems})
+        
+        return report
+    
+    def check_query_plans(self) -> List[Dict]:
+        """Get the queries whose plans scan a table or sort in a temp B-tree."""
+        return [entry for entry in self.explain_queries() if entry['problems']]
+    
     def close(self):
-        """Close database connection."""
-        self.conn.close()
\ No newline at end of file
+        """Close database connections."""
+        if self.readers is not None:
+            self.readers.close()
+        self.conn.close()
+
+
+class WriteBehindQueue:
+    """Queue of task edits written to the database as one transaction.
+    
+    Edits are kept in memory and coalesced per task until they are taken
+    and written with a single commit. Each edit is appended to a journal
+    file and synced before it is acknowledged, so queued edits survive a
+    crash and are loaded again when the queue is next opened.
+    
+    The queue never touches the database itself: take() hands the edits
+    to whoever writes them, and checkpoint() drops them from the journal
+    once that write has committed.
+    """
+    
+    def __init__(self, journal_path: Optional[str]):
+        self.journal_path = journal_path
+        self._updates = {}  # task_id -> merged changes
+        self._deletes = set()
+        self._journal = None
+        
+        if self.journal_path:
+            self.load_journal()
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+    
+    @staticmethod
+    def journal_for(db_name: str) -> Optional[str]:
+        """Get the journal path used for a database, None for :memory:."""
+        return None if db_name == ":memory:" else db_name + ".queue"
+    
+    def __len__(self) -> int:
+        return len(self._updates) + len(self._deletes)
+    
+    def _apply(self, entry: Dict):
+        """Apply a journal entry to the in-memory queue."""
+        task_id = entry['id']
+        if entry['op'] == 'delete':
+            self._updates.pop(task_id, None)
+            self._deletes.add(task_id)
+        elif task_id not in self._deletes:
+            self._updates.setdefault(task_id, {}).update(entry['changes'])
+    
+    def _sync(self):
+        """Flush the journal to disk."""
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+    
+    def _log(self, entry: Dict):
+        """Apply an entry and make it durable in the journal."""
+        self._apply(entry)
+        if self._journal is not None:
+            self._journal.write(json.dumps(entry) + "\n")
+            self._sync()
+    
+    def update(self, task_id: int, changes: Dict):
+        """Queue an update of task attributes."""
+        self._log({'op': 'update', 'id': task_id, 'changes': changes})
+    
+    def delete(self, task_id: int):
+        """Queue a task deletion."""
+        self._log({'op': 'delete', 'id': task_id})
+    
+    def take(self):
+        """Remove and return the queued (updates, deletes) for writing.
+        
+        The journal keeps them until checkpoint() is called after the
+        write commits.
+        """
+        updates, deletes = self._updates, self._deletes
+        self._updates = {}
+        self._deletes = set()
+        return updates, deletes
+    
+    def requeue(self, updates: Dict, deletes: set):
+        """Put back edits whose write failed, under any newer edits."""
+        for task_id, changes in updates.items():
+            if task_id not in self._deletes:
+                self._updates[task_id] = dict(changes, **self._updates.get(task_id, {}))
+        for task_id in deletes:
+            self._updates.pop(task_id, None)
+            self._deletes.add(task_id)
+    
+    def checkpoint(self):
+        """Replace the journal with one holding only the edits still queued.
+        
+        The new journal is written and synced beside the old one and then
+        renamed over it, so a crash leaves one of them whole.
+        """
+        if self._journal is None:
+            return
+        
+        path = self.journal_path + ".part"
+        with open(path, "w", encoding="utf-8") as journal:
+            for task_id in self._deletes:
+                journal.write(json.dumps({'op': 'delete', 'id': task_id}) + "\n")
+            for task_id, changes in self._updates.items():
+                journal.write(
+                    json.dumps({'op': 'update', 'id': task_id, 'changes': changes}) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        
+        self._journal.close()
+        os.replace(path, self.journal_path)
+        self._sync_directory()
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+    
+    def _sync_directory(self):
+        """Make a rename of the journal durable, where directories can be synced."""
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        fd = os.open(os.path.dirname(os.path.abspath(self.journal_path)),
+                     os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    
+    def flush(self, db: DatabaseManager) -> int:
+        """Write all queued edits to db in one transaction and return their count."""
+        count = len(self)
+        if count:
+            updates, deletes = self.take()
+            try:
+                db.apply_edits(updates, deletes)
+            except Exception:
+                self.requeue(updates, deletes)
+                raise
+            self.checkpoint()
+        return count
+    
+    def load_journal(self) -> int:
+        """Load edits left in the journal by a previous run.
+        
+        A partial last line, from a crash while it was written, was never
+        acknowledged. It is cut off, so new entries are not appended to it.
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+        
+        with open(self.journal_path, "r+b") as journal:
+            valid = 0  # bytes of the complete entries
+            for line in journal:
+                try:
+                    entry = json.loads(line) if line.endswith(b"\n") else None
+                except ValueError:
+                    entry = None
+                if entry is None:
+                    break
+                self._apply(entry)
+                valid += len(line)
+            
+            if journal.seek(0, os.SEEK_END) > valid:
+                journal.truncate(valid)
+                journal.flush()
+                os.fsync(journal.fileno())
+        
+        return len(self)
+    
+    def close(self):
+        """Close the journal, removing it when nothing is left queued."""
+        if self._journal is None:
+            return
+        
+        self._journal.close()
+        self._journal = None
+        if not len(self):
+            os.remove(self.journal_path)
@@ -0,0 +1,151 @@
+"""
+Import pipeline for Task Manager application.
+Reads exported task files and turns their rows into clean task data.
+
+Records flow through three steps: read_records parses them from the
+file, validate rejects the ones that cannot become a task, and
+normalize coerces the rest to the values the database stores.
+"""
+import csv
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterator, Tuple
+
+try:
+    from dateutil import parser as date_parser
+except ImportError:  # python-dateutil is optional, common formats still parse
+    date_parser = None
+
+IMPORT_FORMATS = ('jsonl', 'csv')
+
+# Date formats tried when python-dateutil is not installed
+DATE_FORMATS = (
+    "%Y/%m/%d", "%Y/%m/%d %H:%M", "%m/%d/%Y", "%m/%d/%Y %H:%M",
+    "%d.%m.%Y", "%d.%m.%Y %H:%M", "%b %d, %Y", "%b %d, %Y %H:%M",
+)
+
+PRIORITY_NAMES = {'high': 1, 'medium': 2, 'low': 3}
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'done', 'completed'}
+FALSE_VALUES = {'', '0', 'false', 'no', 'n', 'pending'}
+
+
+def import_format(path: str, fmt: str = None) -> str:
+    """Get the import format, from the file extension when not given."""
+    if fmt is None:
+        fmt = os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unknown import format: {fmt!r}")
+    return fmt
+
+
+def read_records(file, fmt: str) -> Iterator[Tuple[str, Dict]]:
+    """Parse (kind, record) pairs from an open file, kind is 'task' or 'category'.
+    
+    JSON Lines records say their kind in a 'record' key and default to
+    tasks. Every CSV row is a task. Lines are parsed one at a time, so
+    files of any size can be read.
+    """
+    if fmt == 'csv':
+        for row in csv.DictReader(file):
+            yield 'task', row
+        return
+    
+    for line_number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as error:
+            yield 'invalid', {'error': f"line {line_number}: {error}"}
+            continue
+        if not isinstance(record, dict):
+            yield 'invalid', {'error': f"line {line_number}: not an object"}
+            continue
+        yield record.pop('record', 'task'), record
+
+
+def validate(kind: str, record: Dict):
+    """Raise ValueError if the record cannot be imported."""
+    if kind == 'invalid':
+        raise ValueError(record['error'])
+    if kind not in ('task', 'category'):
+        raise ValueError(f"unknown record kind {kind!r}")
+    
+    field = 'title' if kind == 'task' else 'name'
+    value = record.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"{kind} without a {field}")
+
+
+def normalize(record: Dict) -> Dict:
+    """Coerce a task record to the arguments of DatabaseManager.add_tasks.
+    
+    Raises ValueError for values that cannot be coerced.
+    """
+    category = record.get('category')
+    return {
+        'title': record['title'].strip(),
+        'description': str(record.get('description') or ""),
+        'priority': normalize_priority(record.get('priority')),
+        'due_date': normalize_date(record.get('due_date')),
+        'completed': normalize_bool(record.get('completed')),
+        'category': str(category).strip() if category else "General",
+    }
+
+
+def normalize_priority(value) -> int:
+    """Coerce a priority number or name to 1, 2 or 3, defaulting to 2."""
+    if value is None or value == "":
+        return 2
+    if isinstance(value, str):
+        name = value.strip().lower()
+        if name in PRIORITY_NAMES:
+            return PRIORITY_NAMES[name]
+        value = name
+    try:
+        priority = int(float(value))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid priority {value!r}")
+    return min(max(priority, 1), 3)
+
+
+def normalize_date(value) -> str:
+    """Convert a date in a common format to an ISO date and time, or None."""
+    if value is None or str(value).strip() == "":
+        return None
+    text = str(value).strip()
+    
+    try:
+        due = datetime.fromisoformat(text)
+    except ValueError:
+        due = parse_date(text)
+    return due.isoformat(timespec='seconds')
+
+
+def parse_date(text: str) -> datetime:
+    """Parse a date that is not in ISO format."""
+    if date_parser is not None:
+        try:
+            return date_parser.parse(text)
+        except (ValueError, OverflowError):
+            raise ValueError(f"invalid date {text!r}")
+    
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format)
+        except ValueError:
+            pass
+    raise ValueError(f"invalid date {text!r}")
+
+
+def normalize_bool(value) -> bool:
+    """Coerce a completed flag from a number, bool or word."""
+    if isinstance(value, (bool, int, float)):
+        return bool(value)
+    text = str(value or "").strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"invalid completed flag {value!r}")
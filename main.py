@@ -2,24 +2,95 @@
 Modern desktop application for managing tasks efficiently.
 """
 
+import time
+STARTED = time.perf_counter()  # before the imports, for --measure-startup
+
+import logging
 import sys
 from datetime import datetime, timedelta
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QLineEdit, QPushButton, QTextEdit, QComboBox,
-    QDateEdit, QTimeEdit, QGroupBox, QScrollArea, QFrame,
+    QDateEdit, QTimeEdit, QGroupBox, QFrame,
     QTabWidget, QMessageBox, QMenuBar, QMenu, QStatusBar,
-    QGridLayout, QDialog, QFormLayout, QDialogButtonBox
+    QGridLayout, QDialog, QFormLayout, QDialogButtonBox, QListView,
+    QFileDialog, QProgressDialog, QTableWidget, QTableWidgetItem, QHeaderView,
+    QCheckBox
 )
-from PyQt6.QtCore import Qt, QTimer, QDateTime
+from PyQt6.QtCore import Qt, QTimer, QDateTime, QEvent, QObject, pyqtSignal
 # Add QIcon to the imports:
 from PyQt6.QtGui import QFont, QIcon, QAction
 
 from utils import resource_path
-from database import DatabaseManager
-from widgets import TaskWidget, StatisticsWidget
-from styles import MAIN_STYLESHEET, DARK_STYLESHEET
+from database import STORAGE_PROFILES, OperationCancelled, WriteBehindQueue
+from models import CATEGORY_PALETTE, CategoryRegistry, due_timestamp
+from profiling import profiled, profiler
+import sqltrace
+from snapshot import TaskSnapshot, snapshot_path, write_snapshot
+from workers import DatabaseThread, ProgressReporter, SearchWorker
+from widgets import OverdueScheduler, TaskListModel, TaskItemDelegate, StatisticsWidget
+from styles import application_stylesheet, restyle
+
+logger = logging.getLogger(__name__)
+IMPORTED = time.perf_counter()
+
+class StartupMeasurement(QObject):
+    """Records how long startup takes to reach each milestone.
+    
+    Times are seconds since the main module started importing. finished
+    is emitted once every milestone has been reached.
+    """
+    finished = pyqtSignal(dict)
+    
+    # Milestone and what reaching it means
+    MILESTONES = [
+        ('imports', "modules imported"),
+        ('window', "window built"),
+        ('shell_paint', "window first painted"),
+        ('db_open', "database opened"),
+        ('first_query', "first page of tasks fetched"),
+        ('first_paint', "first page of tasks painted"),
+    ]
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.times = {'imports': IMPORTED - STARTED}
+        self._paint_marks = {}  # watched widget -> milestone of its first paint
+    
+    def mark(self, name: str, at: float = None):
+        """Record reaching a milestone, at a perf_counter() time or now."""
+        if name in self.times:
+            return
+        self.times[name] = (time.perf_counter() if at is None else at) - STARTED
+        if name == 'first_query':
+            # Paint the fetched rows even if they match the preview
+            for widget, milestone in self._paint_marks.items():
+                if milestone == 'first_paint':
+                    widget.update()
+        if len(self.times) == len(self.MILESTONES):
+            self.finished.emit(dict(self.times))
+    
+    def watch_paint(self, widget: QWidget, name: str):
+        """Mark a milestone on the first paint of a widget."""
+        self._paint_marks[widget] = name
+        widget.installEventFilter(self)
+    
+    def eventFilter(self, watched, event) -> bool:
+        if event.type() == QEvent.Type.Paint and watched in self._paint_marks:
+            name = self._paint_marks[watched]
+            # Tasks are only painted once they have been fetched
+            if name != 'first_paint' or 'first_query' in self.times:
+                self.mark(name)
+        return False
+    
+    def report(self) -> str:
+        """Format the milestone times as a table, in the order they were reached."""
+        descriptions = dict(self.MILESTONES)
+        lines = ["Startup timings (ms since start):"]
+        for name, seconds in sorted(self.times.items(), key=lambda item: item[1]):
+            lines.append(f"  {name:<12} {seconds * 1000:8.1f}  {descriptions[name]}")
+        return "\n".join(lines)
 
 
 class AddTaskDialog(QDialog):
@@ -64,10 +135,8 @@ class AddTaskDialog(QDialog):
             self.priority_combo.setCurrentText("Medium")
         form_layout.addRow("Priority:", self.priority_combo)
         
-        # Category field
+        # Category field, filled by set_categories
         self.category_combo = QComboBox()
-        if self.is_edit_mode:
-            self.category_combo.setCurrentText(self.task_data.get('category', 'General'))
         form_layout.addRow("Category:", self.category_combo)
         
         # Due date and time
@@ -98,12 +167,14 @@ class AddTaskDialog(QDialog):
         
         self.setLayout(layout)
     
-    def set_categories(self, categories):
+    def set_categories(self, names: list):
         """Set available categories."""
         self.category_combo.clear()
-        for category in categories:
-            self.category_combo.addItem(category['name'])
-        self.category_combo.setCurrentText('General')
+        self.category_combo.addItems(names)
+        if self.is_edit_mode:
+            self.category_combo.setCurrentText(self.task_data.get('category') or 'General')
+        else:
+            self.category_combo.setCurrentText('General')
     
     def get_task_data(self):
         """Get task data from dialog inputs."""
@@ -143,14 +214,7 @@ class AddCategoryDialog(QDialog):
         
         # Color selection
         self.color_combo = QComboBox()
-        colors = [
-            ("Blue", "#3498db"),
-            ("Red", "#e74c3c"),
-            ("Green", "#2ecc71"),
-            ("Orange", "#f39c12"),
-            ("Purple", "#9b59b6"),
-            ("Teal", "#1abc9c")
-        ]
+        colors = list(CATEGORY_PALETTE.items())
         for color_name, color_code in colors:
             self.color_combo.addItem(color_name, color_code)
         form_layout.addRow("Color:", self.color_combo)
@@ -200,17 +264,153 @@ class AddCategoryDialog(QDialog):
             'color': self.color_combo.currentData()
         }
 
+class ProfilingDialog(QDialog):
+    """Dialog showing the p50/p99 duration of each profiled span.
+    
+    The table is refreshed every second while the dialog is open, over
+    the latest runs of each span.
+    """
+    COLUMNS = ["Span", "Category", "Count", "p50 (ms)", "p99 (ms)", "Max (ms)"]
+    REFRESH_INTERVAL = 1000  # milliseconds
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Profiling")
+        self.setMinimumSize(640, 400)
+        self.init_ui()
+        self.refresh()
+        
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(self.REFRESH_INTERVAL)
+    
+    def init_ui(self):
+        """Initialize dialog UI."""
+        layout = QVBoxLayout()
+        
+        self.enabled_check = QCheckBox("Record spans")
+        self.enabled_check.setChecked(profiler.enabled)
+        self.enabled_check.toggled.connect(self.set_enabled)
+        layout.addWidget(self.enabled_check)
+        
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+        
+        button_layout = QHBoxLayout()
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset)
+        button_layout.addWidget(reset_btn)
+        
+        export_btn = QPushButton("Export Chrome Trace...")
+        export_btn.clicked.connect(lambda: export_trace(self))
+        button_layout.addWidget(export_btn)
+        
+        button_layout.addStretch()
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+        
+        self.setLayout(layout)
+    
+    def set_enabled(self, enabled: bool):
+        """Start or stop recording spans."""
+        profiler.enabled = enabled
+        if self.parent() is not None:
+            self.parent().profiling_action.setChecked(enabled)
+    
+    def reset(self):
+        """Drop the recorded spans."""
+        profiler.reset()
+        self.refresh()
+    
+    def refresh(self):
+        """Fill the table with the current summary, slowest spans in total first."""
+        rows = profiler.summary()
+        self.table.setRowCount(len(rows))
+        for row, span in enumerate(rows):
+            values = [span['name'], span['category'], str(span['count']),
+                      f"{span['p50_ms']:.3f}", f"{span['p99_ms']:.3f}", f"{span['max_ms']:.3f}"]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column >= 2:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+def export_trace(parent: QWidget):
+    """Ask for a file and export the recorded spans to it as a Chrome trace."""
+    path, _ = QFileDialog.getSaveFileName(
+        parent, "Export Chrome Trace", "trace.json", "Chrome trace (*.json)"
+    )
+    if not path:
+        return
+    try:
+        count = profiler.export_chrome_trace(path)
+    except OSError as error:
+        QMessageBox.critical(parent, "Export Chrome Trace", f"Exporting the trace failed: {error}")
+        return
+    QMessageBox.information(parent, "Export Chrome Trace",
+                            f"Exported {count} trace events to {path}.\n"
+                            "Open it in chrome://tracing or ui.perfetto.dev.")
+
 class TaskManagerApp(QMainWindow):
     """Main application window."""
+    SEARCH_LIMIT = 500  # maximum number of search results shown
+    SEARCH_DELAY = 250  # milliseconds of typing pause before searching
+    STORAGE_PROFILE = "durable"  # see database.STORAGE_PROFILES
+    WRITE_BEHIND = True  # queue task edits and commit them in groups
+    FLUSH_DELAY = 1000  # milliseconds before queued edits are committed
+    SNAPSHOT = True  # paint the first tasks from a snapshot saved at close
     
-    def __init__(self):
+    def __init__(self, startup: StartupMeasurement = None):
         super().__init__()
-        self.db = DatabaseManager()
+        self.startup = startup
+        self.confirm_exit = True
+        # All database access goes through the database thread
+        self.db = DatabaseThread("tasks.db", STORAGE_PROFILES[self.STORAGE_PROFILE], self)
+        self.db.start()
+        self.db.submit('effective_pragmas', callback=lambda pragmas: logger.info(
+            "Storage profile '%s': %s", self.db.profile.name, pragmas))
+        if self.startup is not None:
+            # Timed on the database thread, once the database is open
+            self.db.submit(lambda db: time.perf_counter(),
+                           callback=lambda opened: self.startup.mark('db_open', opened))
+        self.write_queue = WriteBehindQueue(WriteBehindQueue.journal_for(self.db.db_name))
+        self.flushing = None  # (updates, deletes) being committed
+        # Loaded once, and again when categories are added
+        self.categories = CategoryRegistry()
+        # First screen of tasks saved at the last close, shown until loaded
+        self.snapshot_path = snapshot_path(self.db.db_name) if self.SNAPSHOT else None
+        self.snapshot = TaskSnapshot.open(self.snapshot_path) if self.snapshot_path else None
         self.current_filter = "All"
         self.dark_mode = False
+        self.search_generation = 0
+        self.search_worker = SearchWorker(self.db, self.SEARCH_LIMIT, self)
+        self.search_worker.results_ready.connect(self.show_search_results)
+        self.search_worker.start()
+        self.completed_loaded = False
+        self.completed_preview = None
+        # Profiled phases, ended when their results are shown
+        self.load_phase = None
+        self.search_phase = None
         self.init_ui()
-        #self.load_categories()
+        
+        # Only the visible pending list loads before the window shows, the
+        # rest waits for the first event loop turn
         self.load_tasks()
+        QTimer.singleShot(0, self.finish_startup)
+        if self.startup is not None:
+            self.startup.watch_paint(self, 'shell_paint')
+            self.startup.watch_paint(self.pending_view.viewport(), 'first_paint')
+            self.startup.mark('window')
+    
+    def finish_startup(self):
+        """Load what the first screen does not need."""
+        self.load_categories()
         self.update_statistics()
     
     def init_ui(self):
@@ -236,9 +436,20 @@ class TaskManagerApp(QMainWindow):
         main_layout.addWidget(header_widget)
         
         # Statistics widget
-        self.stats_widget = QWidget()
+        self.stats_widget = StatisticsWidget()
         main_layout.addWidget(self.stats_widget)
         
+        # Task list models share one delegate for painting rows
+        self.pending_model = TaskListModel(self)
+        self.completed_model = TaskListModel(self)
+        self.task_delegate = TaskItemDelegate(self, self.categories)
+        self.task_delegate.task_updated.connect(self.update_task)
+        self.task_delegate.task_deleted.connect(self.delete_task)
+        
+        # Rows and the overdue count change as due times pass
+        self.overdue_scheduler = OverdueScheduler(self.pending_model, self)
+        self.overdue_scheduler.became_overdue.connect(lambda task_ids: self.update_statistics())
+        
         # Create tab widget
         self.tab_widget = QTabWidget()
         
@@ -251,6 +462,7 @@ class TaskManagerApp(QMainWindow):
         self.completed_tab = QWidget()
         self.setup_completed_tab()
         self.tab_widget.addTab(self.completed_tab, "✅ Completed Tasks")
+        self.tab_widget.currentChanged.connect(self.tab_changed)
         
         main_layout.addWidget(self.tab_widget)
         
@@ -261,6 +473,12 @@ class TaskManagerApp(QMainWindow):
         self.auto_save_timer = QTimer()
         self.auto_save_timer.timeout.connect(self.auto_save)
         self.auto_save_timer.start(30000)  # Auto-save every 30 seconds
+        
+        # Commit queued edits shortly after the first one of a burst
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(self.FLUSH_DELAY)
+        self.flush_timer.timeout.connect(self.flush_writes)
     
     def create_menu_bar(self):
         """Create menu bar."""
@@ -315,6 +533,22 @@ class TaskManagerApp(QMainWindow):
         stats_action.triggered.connect(self.show_statistics_dialog)
         tools_menu.addAction(stats_action)
         
+        tools_menu.addSeparator()
+        
+        self.profiling_action = QAction("Enable Profiling", self)
+        self.profiling_action.setCheckable(True)
+        self.profiling_action.setChecked(profiler.enabled)
+        self.profiling_action.toggled.connect(self.set_profiling)
+        tools_menu.addAction(self.profiling_action)
+        
+        profiling_summary_action = QAction("Profiling Summary", self)
+        profiling_summary_action.triggered.connect(self.show_profiling_dialog)
+        tools_menu.addAction(profiling_summary_action)
+        
+        export_trace_action = QAction("Export Chrome Trace", self)
+        export_trace_action.triggered.connect(lambda: export_trace(self))
+        tools_menu.addAction(export_trace_action)
+        
         # Help menu
         help_menu = menubar.addMenu("Help")
         
@@ -348,29 +582,27 @@ class TaskManagerApp(QMainWindow):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search tasks by title, description or category...")
         self.search_input.setMinimumWidth(400)  # Wider search box
-        # Connect to search function when text changes
-        self.search_input.textChanged.connect(self.search_tasks)
+        # Search once typing pauses instead of on every keystroke
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DELAY)
+        self.search_timer.timeout.connect(self.search_tasks)
+        self.search_input.textChanged.connect(self.search_timer.start)
         search_layout.addWidget(self.search_input)
         
         # Search button
         search_btn = QPushButton("🔍 Search")
-        search_btn.clicked.connect(self.search_tasks)
+        # clicked carries the checked state, which search_tasks() does not take
+        search_btn.clicked.connect(lambda: self.search_tasks())
         search_layout.addWidget(search_btn)
         
         # Clear search button
         clear_search_btn = QPushButton("✕ Clear")
         clear_search_btn.clicked.connect(self.clear_search)
-        clear_search_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #95a5a6;
-                color: white;
-                padding: 8px 12px;
-                border-radius: 4px;
-            }
-            QPushButton:hover {
-                background-color: #7f8c8d;
-            }
-        """)
+        clear_search_btn.setObjectName("clearSearchButton")
+        # Highlighted while there is a search to clear
+        self.search_input.textChanged.connect(
+            lambda text: restyle(clear_search_btn, active=bool(text)))
         search_layout.addWidget(clear_search_btn)
         
         # Add search widget to header
@@ -385,16 +617,9 @@ class TaskManagerApp(QMainWindow):
         """Setup pending tasks tab."""
         layout = QVBoxLayout(self.pending_tab)
         
-        # Tasks container with scroll
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        
-        self.pending_container = QWidget()
-        self.pending_layout = QVBoxLayout(self.pending_container)
-        self.pending_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-        
-        scroll_area.setWidget(self.pending_container)
-        layout.addWidget(scroll_area)
+        # Tasks view only paints the visible rows
+        self.pending_view = self.create_task_view(self.pending_model)
+        layout.addWidget(self.pending_view)
     
     def setup_completed_tab(self):
         """Setup completed tasks tab."""
@@ -403,75 +628,133 @@ class TaskManagerApp(QMainWindow):
         # Clear completed button
         clear_btn = QPushButton("Clear All Completed Tasks")
         clear_btn.clicked.connect(self.clear_completed_tasks)
-        clear_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #e74c3c;
-                color: white;
-                padding: 10px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #c0392b;
-            }
-        """)
+        clear_btn.setObjectName("clearCompletedButton")
         layout.addWidget(clear_btn)
         
-        # Tasks container with scroll
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        
-        self.completed_container = QWidget()
-        self.completed_layout = QVBoxLayout(self.completed_container)
-        self.completed_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-        
-        scroll_area.setWidget(self.completed_container)
-        layout.addWidget(scroll_area)
+        # Tasks view only paints the visible rows
+        self.completed_view = self.create_task_view(self.completed_model)
+        layout.addWidget(self.completed_view)
+    
+    def create_task_view(self, model: TaskListModel) -> QListView:
+        """Create a list view for task rows."""
+        view = QListView()
+        view.setModel(model)
+        view.setItemDelegate(self.task_delegate)
+        view.setUniformItemSizes(True)
+        view.setMouseTracking(True)
+        view.setSelectionMode(QListView.SelectionMode.NoSelection)
+        view.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        view.setFrameShape(QFrame.Shape.NoFrame)
+        return view
     
     def load_categories(self):
         """Load categories from database."""
-        categories = self.db.get_categories()
+        self.db.read('get_categories', callback=self.set_categories)
+    
+    def set_categories(self, categories: list):
+        """Keep loaded categories for the task dialog and the task rows."""
+        self.categories.load(categories)
+        # Rows may have been painted with default colors before
+        self.pending_view.viewport().update()
+        self.completed_view.viewport().update()
         #self.filter_combo.clear()
         #self.filter_combo.addItem("All Categories")
         #for category in categories:
         #    self.filter_combo.addItem(category['name'])
-        pass # Just do nothing for now
     
+    @profiled(category='app')
     def load_tasks(self):
-        """Load tasks from database."""
-        # Clear existing tasks
-        self.clear_layout(self.pending_layout)
-        self.clear_layout(self.completed_layout)
-        
-        # Load pending tasks
-        pending_tasks = self.db.get_tasks(completed=False)
-        for task_data in pending_tasks:
-            task_widget = TaskWidget(task_data)
-            task_widget.task_updated.connect(self.update_task)
-            task_widget.task_deleted.connect(self.delete_task)
-            self.pending_layout.addWidget(task_widget)
-        
-        # Load completed tasks
-        completed_tasks = self.db.get_tasks(completed=True)
-        for task_data in completed_tasks:
-            task_widget = TaskWidget(task_data)
-            task_widget.task_updated.connect(self.update_task)
-            task_widget.task_deleted.connect(self.delete_task)
-            self.completed_layout.addWidget(task_widget)
-        
-        # Add stretch to push tasks to top
-        self.pending_layout.addStretch()
-        self.completed_layout.addStretch()
+        """Load tasks from database.
+        
+        The completed list is only loaded while its tab is shown, or
+        once the tab is first opened.
+        """
+        self.load_phase = profiler.begin('load_tasks')
+        self.flush_writes()
+        
+        pending_preview = None
+        if self.snapshot is not None:
+            pending_preview = self.snapshot.tasks(completed=False)
+            self.completed_preview = self.snapshot.tasks(completed=True)
+            self.snapshot.close()
+            self.snapshot = None
+        
+        # Pending and completed lists fetch pages as they are scrolled
+        self.pending_model.set_source(
+            lambda after, limit, callback: self.fetch_task_page(False, after, limit, callback),
+            preview=pending_preview)
+        self.completed_loaded = False
+        if self.tab_widget.currentWidget() is self.completed_tab:
+            self.load_completed_tasks()
         
         # Update status bar
-        pending_count = len(pending_tasks)
-        completed_count = len(completed_tasks)
-        self.status_bar.showMessage(f"Loaded {pending_count} pending and {completed_count} completed tasks")
+        self.db.read('get_task_statistics', callback=lambda stats: self.status_bar.showMessage(
+            f"Loaded {stats['pending']} pending and {stats['completed']} completed tasks"))
+    
+    def load_completed_tasks(self):
+        """Load the completed list, showing its snapshot rows until it arrives."""
+        preview, self.completed_preview = self.completed_preview, None
+        self.completed_model.set_source(
+            lambda after, limit, callback: self.fetch_task_page(True, after, limit, callback),
+            preview=preview)
+        self.completed_loaded = True
+    
+    def tab_changed(self, index: int):
+        """Load the completed list the first time its tab is shown."""
+        if self.tab_widget.widget(index) is self.completed_tab and not self.completed_loaded:
+            self.load_completed_tasks()
+    
+    def fetch_task_page(self, completed: bool, after, limit: int, callback):
+        """Fetch a page of tasks on a reader thread."""
+        # Queued edits are written first so the page reflects them
+        self.flush_writes()
+        if not completed and (self.startup is not None or self.load_phase is not None):
+            phase, self.load_phase = self.load_phase, None
+            fetched = callback
+            
+            def callback(tasks):
+                if self.startup is not None:
+                    self.startup.mark('first_query')
+                fetched(tasks)
+                profiler.end(phase)
+        self.db.read('iter_tasks', completed=completed, after=after, limit=limit,
+                     callback=callback)
+    
+    def find_task(self, task_id: int):
+        """Find task data in the task lists."""
+        task = self.pending_model.get_task(task_id)
+        if task is None:
+            task = self.completed_model.get_task(task_id)
+        return task
+    
+    def apply_task_change(self, task_id: int, task: dict = None):
+        """Patch the task lists for a single changed task.
+        
+        Passing None as task removes the row. Only the affected row is
+        touched, so the lists never need to be re-queried after an edit.
+        """
+        if task is not None:
+            model = self.completed_model if task['completed'] else self.pending_model
+            if model.get_task(task_id) is not None:
+                model.update_task(task)
+                return
+        
+        self.pending_model.remove_task(task_id)
+        self.completed_model.remove_task(task_id)
+        if task is not None:
+            model.insert_task(task)
     
     def update_task(self, task_id: int, changes: dict):
         """Update task in database."""
-        self.db.update_task(task_id, **changes)
-        self.load_tasks()
-        self.update_statistics()
+        self.write_queue.update(task_id, changes)
+        
+        task = self.find_task(task_id)
+        if task is not None:
+            task = dict(task, **changes)
+            if 'due_date' in changes:
+                task['due_ts'] = due_timestamp(changes['due_date'])
+            self.apply_task_change(task_id, task)
+        self.schedule_flush()
         
         if 'completed' in changes:
             status = "completed" if changes['completed'] else "marked as pending"
@@ -487,11 +770,52 @@ class TaskManagerApp(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            self.db.delete_task(task_id)
-            self.load_tasks()
-            self.update_statistics()
+            self.write_queue.delete(task_id)
+            self.apply_task_change(task_id)
+            self.schedule_flush()
             self.status_bar.showMessage("Task deleted successfully")
     
+    def schedule_flush(self):
+        """Commit queued edits soon, or right away without write-behind."""
+        if not self.WRITE_BEHIND:
+            self.flush_writes()
+        elif not self.flush_timer.isActive():
+            self.flush_timer.start()
+    
+    def flush_writes(self, then=None):
+        """Commit queued task edits in one transaction.
+        
+        then is called once the edits are committed, or right away when
+        nothing is queued.
+        """
+        self.flush_timer.stop()
+        if self.flushing is not None or not len(self.write_queue):
+            if self.flushing is not None:
+                # Edits queued meanwhile go in the next flush
+                self.flush_timer.start()
+            if then is not None:
+                # Requests run in order, so later ones see the flushed edits
+                self.db.submit(lambda db: None, callback=lambda result: then())
+            return
+        
+        updates, deletes = self.write_queue.take()
+        self.flushing = (updates, deletes)
+        
+        def committed(result):
+            self.flushing = None
+            self.write_queue.checkpoint()
+            self.update_statistics()
+            if then is not None:
+                then()
+        
+        def failed(error):
+            self.flushing = None
+            self.write_queue.requeue(updates, deletes)
+            logger.error("Saving task edits failed", exc_info=error)
+            self.status_bar.showMessage(f"Saving task edits failed: {error}")
+        
+        self.db.submit('apply_edits', updates, deletes, callback=committed, errback=failed)
+    
     def add_quick_task(self):
         """Add a quick task from the input field."""
         title = self.quick_task_input.text().strip()
@@ -499,16 +823,22 @@ class TaskManagerApp(QMainWindow):
             QMessageBox.warning(self, "Warning", "Please enter a task title")
             return
         
-        task_id = self.db.add_task(title=title)
         self.quick_task_input.clear()
-        self.load_tasks()
-        self.update_statistics()
-        self.status_bar.showMessage("Task added successfully")
+        self.add_task({'title': title})
+    
+    def add_task(self, task_data: dict):
+        """Add a task on the database thread and show it when stored."""
+        def added(task):
+            self.apply_task_change(task['id'], task)
+            self.update_statistics()
+            self.status_bar.showMessage("Task added successfully")
+        
+        self.db.submit(lambda db: db.get_task(db.add_task(**task_data)), callback=added)
     
     def show_add_task_dialog(self):
         """Show dialog to add a new task."""
         dialog = AddTaskDialog(self)
-        dialog.set_categories(self.db.get_categories())
+        dialog.set_categories(self.categories.names())
         
         if dialog.exec():
             task_data = dialog.get_task_data()
@@ -517,10 +847,7 @@ class TaskManagerApp(QMainWindow):
                 QMessageBox.warning(self, "Warning", "Please enter a task title")
                 return
             
-            task_id = self.db.add_task(**task_data)
-            self.load_tasks()
-            self.update_statistics()
-            self.status_bar.showMessage("Task added successfully")
+            self.add_task(task_data)
     
     def show_add_category_dialog(self):
         """Show dialog to add a new category."""
@@ -533,21 +860,28 @@ class TaskManagerApp(QMainWindow):
                 QMessageBox.warning(self, "Warning", "Please enter a category name")
                 return
             
-            self.db.add_category(**category_data)
+            self.db.submit('add_category', **category_data)
+            self.categories.invalidate()
             self.load_categories()
             self.status_bar.showMessage("Category added successfully")
         
+    @profiled(category='app')
     def update_statistics(self):
         """Update statistics widget."""
-        stats = self.db.get_task_statistics()
-        
-        # Clear existing statistics
-        self.clear_layout(self.stats_widget.layout())
-        
-        # Create new statistics layout
-        stats_layout = QVBoxLayout(self.stats_widget)
-        stats_widget = StatisticsWidget(stats)
-        stats_layout.addWidget(stats_widget)
+        phase = profiler.begin('update_statistics')
+        callback = self.show_statistics
+        if phase is not None:
+            def callback(stats):
+                self.show_statistics(stats)
+                profiler.end(phase)
+        self.db.read('get_task_statistics', callback=callback)
+    
+    @profiled(category='app')
+    def show_statistics(self, stats: dict):
+        """Show statistics in the statistics widget."""
+        self.stats_widget.update(stats)
+        if stats['next_due'] is not None:
+            self.overdue_scheduler.schedule(stats['next_due'])
     
     def clear_completed_tasks(self):
         """Clear all completed tasks."""
@@ -559,24 +893,15 @@ class TaskManagerApp(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
+            self.flush_writes()
+            
             # Delete all completed tasks
-            cursor = self.db.conn.cursor()
-            cursor.execute("DELETE FROM tasks WHERE completed = 1")
-            self.db.conn.commit()
+            self.db.submit('delete_completed_tasks')
             
-            self.load_tasks()
+            self.completed_model.set_tasks([])
             self.update_statistics()
             self.status_bar.showMessage("Completed tasks cleared successfully")
     
-    def clear_layout(self, layout):
-        """Clear all widgets from a layout."""
-        if layout:
-            while layout.count():
-                item = layout.takeAt(0)
-                widget = item.widget()
-                if widget:
-                    widget.deleteLater()
-    
     def toggle_dark_mode(self):
         """Toggle dark mode."""
         self.dark_mode = not self.dark_mode
@@ -586,9 +911,16 @@ class TaskManagerApp(QMainWindow):
         self.status_bar.showMessage(f"Switched to {mode} mode")
     
     def apply_styles(self):
-        """Apply stylesheet to application."""
-        stylesheet = DARK_STYLESHEET if self.dark_mode else MAIN_STYLESHEET
-        self.setStyleSheet(stylesheet)
+        """Apply stylesheet to application.
+        
+        The sheet is set once on the application rather than per widget,
+        so new rows and dialogs are styled without parsing it again.
+        """
+        QApplication.instance().setStyleSheet(application_stylesheet(self.dark_mode))
+        # Rows are painted rather than styled by the sheet
+        self.task_delegate.set_theme(self.dark_mode)
+        self.pending_view.viewport().update()
+        self.completed_view.viewport().update()
     
     def refresh_tasks(self):
         """Refresh tasks from database."""
@@ -598,25 +930,110 @@ class TaskManagerApp(QMainWindow):
     
     def auto_save(self):
         """Auto-save current state."""
-        # In a real application, you might save unsaved changes here
-        # For now, just update the status bar
+        self.flush_writes()
         current_time = datetime.now().strftime("%H:%M:%S")
         self.status_bar.showMessage(f"Auto-saved at {current_time}")
     
     def export_tasks(self):
-        """Export tasks to file."""
-        # Implementation for exporting tasks
-        QMessageBox.information(self, "Export", "Export feature coming soon!")
+        """Export tasks to a JSON Lines or CSV file."""
+        path, selected = QFileDialog.getSaveFileName(
+            self, "Export Tasks", "tasks.jsonl",
+            "JSON Lines (*.jsonl);;CSV (*.csv)"
+        )
+        if not path:
+            return
+        fmt = 'csv' if selected.startswith("CSV") else 'jsonl'
+        if not path.lower().endswith('.' + fmt):
+            path += '.' + fmt
+        
+        progress = QProgressDialog("Exporting tasks...", "Cancel", 0, 0, self)
+        progress.setWindowTitle("Export")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(500)
+        reporter = ProgressReporter(progress)
+        reporter.progressed.connect(lambda done, total: (
+            progress.setMaximum(total), progress.setValue(done)))
+        progress.canceled.connect(reporter.cancel)
+        
+        def exported(count):
+            progress.close()
+            self.status_bar.showMessage(f"Exported {count} tasks to {path}")
+        
+        def failed(error):
+            progress.close()
+            if isinstance(error, OperationCancelled):
+                self.status_bar.showMessage("Export cancelled")
+            else:
+                QMessageBox.critical(self, "Export", f"Exporting tasks failed: {error}")
+        
+        # Queued edits are written first so the export includes them
+        self.flush_writes()
+        self.db.read('export', path, fmt, progress=reporter.report,
+                     cancelled=reporter.is_cancelled, callback=exported, errback=failed)
     
     def import_tasks(self):
-        """Import tasks from file."""
-        # Implementation for importing tasks
-        QMessageBox.information(self, "Import", "Import feature coming soon!")
+        """Import tasks from a JSON Lines or CSV file."""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Tasks", "",
+            "Task files (*.jsonl *.csv);;JSON Lines (*.jsonl);;CSV (*.csv)"
+        )
+        if not path:
+            return
+        
+        progress = QProgressDialog("Importing tasks...", "Cancel", 0, 0, self)
+        progress.setWindowTitle("Import")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(500)
+        reporter = ProgressReporter(progress)
+        # File sizes are scaled to KiB to fit the dialog's int range
+        reporter.progressed.connect(lambda done, total: (
+            progress.setMaximum(total // 1024), progress.setValue(done // 1024)))
+        progress.canceled.connect(reporter.cancel)
+        
+        def reload():
+            self.load_categories()
+            self.load_tasks()
+            self.update_statistics()
+        
+        def imported(result):
+            progress.close()
+            reload()
+            QMessageBox.information(
+                self, "Import",
+                f"Imported {result['imported']} tasks in {result['seconds']:.1f} s "
+                f"({result['rows_per_second']:.0f} rows/s).\n"
+                f"Skipped {result['skipped']} invalid rows.")
+        
+        def failed(error):
+            progress.close()
+            if isinstance(error, OperationCancelled):
+                # Batches written before the cancel stay imported
+                reload()
+                QMessageBox.information(self, "Import", str(error))
+            else:
+                QMessageBox.critical(self, "Import", f"Importing tasks failed: {error}")
+        
+        self.db.submit('import_tasks', path, progress=reporter.report,
+                       cancelled=reporter.is_cancelled, callback=imported, errback=failed)
+    
+    def set_profiling(self, enabled: bool):
+        """Start or stop recording profiling spans."""
+        profiler.enabled = enabled
+        self.status_bar.showMessage("Profiling enabled" if enabled else "Profiling disabled")
+    
+    def show_profiling_dialog(self):
+        """Show the p50/p99 summary of the profiled spans."""
+        dialog = ProfilingDialog(self)
+        dialog.exec()
+        dialog.deleteLater()
     
     def show_statistics_dialog(self):
         """Show detailed statistics dialog."""
-        stats = self.db.get_task_statistics()
-        
+        self.flush_writes()
+        self.db.read('get_task_statistics', callback=self.open_statistics_dialog)
+    
+    def open_statistics_dialog(self, stats: dict):
+        """Open detailed statistics dialog."""
         dialog = QDialog(self)
         dialog.setWindowTitle("Detailed Statistics")
         dialog.setMinimumWidth(400)
@@ -636,8 +1053,14 @@ class TaskManagerApp(QMainWindow):
         Completion Rate: {stats['completed'] / stats['total'] * 100 if stats['total'] > 0 else 0:.1f}%
         """
         
+        if stats['categories']:
+            stats_text += "\n        By Category:\n"
+            for category, counts in sorted(stats['categories'].items()):
+                stats_text += (f"        {category or 'None'}: {counts['pending']} pending, "
+                               f"{counts['completed']} completed\n")
+        
         stats_label = QLabel(stats_text)
-        stats_label.setStyleSheet("font-family: monospace; padding: 20px;")
+        stats_label.setObjectName("statisticsText")
         layout.addWidget(stats_label)
         
         close_btn = QPushButton("Close")
@@ -705,97 +1128,122 @@ class TaskManagerApp(QMainWindow):
     
     def closeEvent(self, event):
         """Handle application close event."""
-        reply = QMessageBox.question(
-            self, 'Confirm Exit',
-            'Are you sure you want to exit?',
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-            QMessageBox.StandardButton.No
-        )
+        reply = QMessageBox.StandardButton.Yes
+        if self.confirm_exit:
+            reply = QMessageBox.question(
+                self, 'Confirm Exit',
+                'Are you sure you want to exit?',
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No
+            )
         
         if reply == QMessageBox.StandardButton.Yes:
-            self.db.close()
+            self.search_worker.stop()
+            self.flush_timer.stop()
+            
+            # Wait for requests in flight. A flush whose callback can no
+            # longer run is queued again, rewriting its edits is harmless.
+            self.db.call(lambda db: None)
+            if self.flushing is not None:
+                self.write_queue.requeue(*self.flushing)
+            
+            # Write queued edits before the database closes
+            updates, deletes = self.write_queue.take()
+            try:
+                self.db.call('apply_edits', updates, deletes)
+            except Exception:
+                self.write_queue.requeue(updates, deletes)
+                logger.exception("Saving task edits failed, they stay in the journal")
+            else:
+                self.write_queue.checkpoint()
+            self.write_queue.close()
+            
+            if self.snapshot_path:
+                self.save_snapshot()
+            self.db.stop()
             event.accept()
         else:
             event.ignore()
 
+    def save_snapshot(self):
+        """Save the first page of each task list for the next start."""
+        limit = TaskListModel.PAGE_SIZE
+        try:
+            self.db.call(lambda db: write_snapshot(
+                self.snapshot_path,
+                db.iter_tasks(False, limit=limit) + db.iter_tasks(True, limit=limit)))
+        except Exception:
+            logger.exception("Saving task snapshot failed")
+    
+    @profiled(category='app')
     def search_tasks(self):
         """Search tasks by keyword in title, description, or category."""
+        self.search_timer.stop()
+        
         # Get search text and convert to lowercase for case-insensitive search
         search_text = self.search_input.text().strip().lower()
         
+        # Newer searches make the results of older ones stale
+        self.search_generation += 1
+        
         # If search is empty, reload all tasks normally
         if not search_text:
             self.load_tasks()
             self.status_bar.showMessage("Showing all tasks")
             return
         
-        # Clear current task displays
-        self.clear_layout(self.pending_layout)
-        self.clear_layout(self.completed_layout)
-        
-        # Get all tasks from database (both pending and completed)
-        # First get pending tasks
-        pending_tasks = self.db.get_tasks(completed=False)
-        
-        # Then get completed tasks
-        completed_tasks = self.db.get_tasks(completed=True)
-        
-        # Combine all tasks
-        all_tasks = pending_tasks + completed_tasks
-        
-        # Filter tasks based on search text
-        found_tasks = []
-        for task in all_tasks:
-            # Check if search text is in title (case-insensitive)
-            title_match = search_text in task['title'].lower()
-            
-            # Check if search text is in description (case-insensitive)
-            desc_match = False
-            if task.get('description'):
-                desc_match = search_text in task['description'].lower()
-            
-            # Check if search text is in category (case-insensitive)
-            category_match = search_text in task.get('category', '').lower()
-            
-            # If any match found, include this task
-            if title_match or desc_match or category_match:
-                found_tasks.append(task)
+        # Full-text search runs on the worker thread, after queued edits
+        # are committed so results reflect them
+        generation = self.search_generation
+        self.search_phase = profiler.begin('search_tasks')
+        self.flush_writes(then=lambda: self.search_worker.search(generation, search_text))
+        self.status_bar.showMessage(f"Searching for '{search_text}'...")
+    
+    @profiled(category='app')
+    def show_search_results(self, generation: int, search_text: str, found_tasks: list):
+        """Show search results from the search worker."""
+        if generation != self.search_generation:
+            return
         
         # Separate found tasks into pending and completed
         found_pending = [t for t in found_tasks if not t['completed']]
         found_completed = [t for t in found_tasks if t['completed']]
         
-        # Display found pending tasks
-        for task_data in found_pending:
-            task_widget = TaskWidget(task_data)
-            task_widget.task_updated.connect(self.update_task)
-            task_widget.task_deleted.connect(self.delete_task)
-            self.pending_layout.addWidget(task_widget)
-        
-        # Display found completed tasks
-        for task_data in found_completed:
-            task_widget = TaskWidget(task_data)
-            task_widget.task_updated.connect(self.update_task)
-            task_widget.task_deleted.connect(self.delete_task)
-            self.completed_layout.addWidget(task_widget)
-        
-        # Add stretch to push tasks to top
-        self.pending_layout.addStretch()
-        self.completed_layout.addStretch()
+        # Display found tasks
+        self.pending_model.set_tasks(found_pending)
+        self.completed_model.set_tasks(found_completed)
+        self.completed_loaded = True
         
         # Update status message
         count = len(found_tasks)
         self.status_bar.showMessage(f"Found {count} task(s) matching '{search_text}'")
+        phase, self.search_phase = self.search_phase, None
+        profiler.end(phase)
 
     def clear_search(self):
         """Clear search input and show all tasks."""
         self.search_input.clear()
+        self.search_timer.stop()
+        self.search_generation += 1
         self.load_tasks()
         self.status_bar.showMessage("Showing all tasks")
 
 def main():
-    """Main application entry point."""
-    app = QApplication(sys.argv)
+    """Main application entry point.
+    
+    With --measure-startup the window reports its startup timings and
+    closes once the first tasks are painted. --profile starts with
+    profiling enabled, see the Tools menu. With TASKMANAGER_SQL_TRACE
+    set, per-statement SQL statistics are reported at exit.
+    """
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+    
+    measure_startup = "--measure-startup" in sys.argv
+    if "--profile" in sys.argv:
+        profiler.enabled = True
+    argv = [arg for arg in sys.argv if arg not in ("--measure-startup", "--profile")]
+    app = QApplication(argv)
     app.setApplicationName("Task Manager")
     app.setOrganizationName("TaskManager Inc.")
     
@@ -809,10 +1257,20 @@ def main():
     except:
         pass
     
-    window = TaskManagerApp()
+    startup = StartupMeasurement() if measure_startup else None
+    window = TaskManagerApp(startup)
+    if startup is not None:
+        def finished(times):
+            print(startup.report(), flush=True)
+            window.confirm_exit = False
+            # Close after the paint that reached the last milestone
+            QTimer.singleShot(0, window.close)
+        startup.finished.connect(finished)
     window.show()
     
-    sys.exit(app.exec())
+    status = app.exec()
+    sqltrace.report_at_exit()
+    sys.exit(status)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
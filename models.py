@@ -1,22 +1,103 @@
 """
 Data models for Task Manager application.
 """
+import time
+from collections.abc import Mapping
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 
-@dataclass
-class Task:
-    """Task data model."""
-    id: Optional[int] = None
-    title: str = ""
-    description: str = ""
-    priority: int = 2  # 1: High, 2: Medium, 3: Low
-    due_date: Optional[str] = None
-    completed: bool = False
-    created_at: Optional[str] = None
-    updated_at: Optional[str] = None
-    category: str = "General"
+# Colors offered for categories
+CATEGORY_PALETTE = {
+    'Blue': '#3498db',
+    'Red': '#e74c3c',
+    'Green': '#2ecc71',
+    'Orange': '#f39c12',
+    'Purple': '#9b59b6',
+    'Teal': '#1abc9c'
+}
+DEFAULT_CATEGORY_COLOR = CATEGORY_PALETTE['Blue']
+
+# Categories every database starts with, and their colors
+DEFAULT_CATEGORIES = {
+    'General': CATEGORY_PALETTE['Blue'],
+    'Work': CATEGORY_PALETTE['Red'],
+    'Personal': CATEGORY_PALETTE['Green'],
+    'Shopping': CATEGORY_PALETTE['Orange'],
+    'Health': CATEGORY_PALETTE['Purple'],
+    'Finance': CATEGORY_PALETTE['Teal']
+}
+
+def due_timestamp(due_date: Optional[str]) -> Optional[int]:
+    """Convert an ISO due date to seconds since the epoch, or None without one.
+    
+    Dates without a time zone are in local time. Due dates are parsed
+    once when written, everything else compares the timestamps.
+    """
+    if not due_date:
+        return None
+    try:
+        return int(datetime.fromisoformat(due_date).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+class Task(Mapping):
+    """Task data model.
+    
+    Tasks are compact records that are shared rather than copied, so
+    they are never changed in place: replace() makes an updated copy.
+    A task reads like the dict of its columns, task['title'] and
+    dict(task) work as they do for a database row.
+    """
+    FIELDS = ('id', 'title', 'description', 'priority', 'due_date', 'completed',
+              'created_at', 'updated_at', 'category', 'due_ts', 'category_id')
+    __slots__ = FIELDS
+    
+    def __init__(self, id: Optional[int] = None, title: str = "", description: str = "",
+                 priority: int = 2,  # 1: High, 2: Medium, 3: Low
+                 due_date: Optional[str] = None, completed: bool = False,
+                 created_at: Optional[str] = None, updated_at: Optional[str] = None,
+                 category: str = "General", due_ts: Optional[int] = None,
+                 category_id: Optional[int] = None):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.priority = priority
+        self.due_date = due_date
+        self.completed = completed
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.category = category
+        self.due_ts = due_ts  # due_date as seconds since the epoch
+        self.category_id = category_id  # id of the category named by category
+    
+    @classmethod
+    def from_row(cls, columns: tuple, row: tuple) -> 'Task':
+        """Create a task from a row of the tasks table and its column names."""
+        if columns == cls.FIELDS:
+            return cls(*row)
+        return cls(**{column: value for column, value in zip(columns, row)
+                      if column in cls.FIELDS})
+    
+    def replace(self, **changes) -> 'Task':
+        """Get a copy of the task with some fields changed."""
+        values = {field: getattr(self, field) for field in self.FIELDS}
+        values.update(changes)
+        return Task(**values)
+    
+    def __getitem__(self, key: str):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self):
+        return iter(self.FIELDS)
+    
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+    
+    def __repr__(self) -> str:
+        return f"Task(id={self.id!r}, title={self.title!r})"
     
     @property
     def priority_text(self) -> str:
@@ -33,30 +114,89 @@ class Task:
     @property
     def is_overdue(self) -> bool:
         """Check if task is overdue."""
-        if not self.due_date or self.completed:
+        if self.due_ts is None or self.completed:
             return False
         
-        try:
-            due = datetime.fromisoformat(self.due_date)
-            return due < datetime.now()
-        except:
-            return False
+        return self.due_ts < time.time()
     
     @property
     def due_date_formatted(self) -> str:
         """Get formatted due date."""
-        if not self.due_date:
-            return "No due date"
+        if self.due_ts is None:
+            return self.due_date or "No due date"
         
-        try:
-            due = datetime.fromisoformat(self.due_date)
-            return due.strftime("%b %d, %Y %H:%M")
-        except:
-            return self.due_date
+        return datetime.fromtimestamp(self.due_ts).strftime("%b %d, %Y %H:%M")
 
 @dataclass
 class Category:
     """Category data model."""
     id: Optional[int] = None
     name: str = ""
-    color: str = "#3498db"
\ No newline at end of file
+    color: str = DEFAULT_CATEGORY_COLOR
+
+class CategoryRegistry:
+    """Categories by name and by id, loaded once from the categories table.
+    
+    Lookups are dict reads. When categories change the registry is
+    invalidated, and its owner loads it again before the next lookup.
+    Until it is loaded, colors come from the default categories.
+    """
+    
+    def __init__(self, categories: Iterable[Dict] = None):
+        self._by_name = {}
+        self._by_id = {}
+        self.loaded = False
+        if categories is not None:
+            self.load(categories)
+    
+    def load(self, categories: Iterable[Dict]):
+        """Replace the categories with rows of the categories table."""
+        self._by_name = {}
+        self._by_id = {}
+        for row in categories:
+            self.add(Category(row['id'], row['name'], row['color'] or DEFAULT_CATEGORY_COLOR))
+        self.loaded = True
+    
+    def add(self, category: Category):
+        """Add or replace one category."""
+        self._by_name[category.name] = category
+        self._by_id[category.id] = category
+    
+    def invalidate(self):
+        """Forget the categories, they changed in the database."""
+        self._by_name = {}
+        self._by_id = {}
+        self.loaded = False
+    
+    def get(self, name: str) -> Optional[Category]:
+        """Get a category by name."""
+        return self._by_name.get(name)
+    
+    def by_id(self, category_id: int) -> Optional[Category]:
+        """Get a category by id."""
+        return self._by_id.get(category_id)
+    
+    def id_of(self, name: str) -> Optional[int]:
+        """Get the id of a category, None if there is no such category."""
+        category = self._by_name.get(name)
+        return category.id if category is not None else None
+    
+    def color_of(self, name: str) -> str:
+        """Get the color of a category."""
+        category = self._by_name.get(name)
+        if category is not None:
+            return category.color
+        return DEFAULT_CATEGORIES.get(name, DEFAULT_CATEGORY_COLOR)
+    
+    def names(self) -> List[str]:
+        """Get the category names in alphabetical order."""
+        return sorted(self._by_name)
+    
+    def __contains__(self, name) -> bool:
+        return name in self._by_name
+    
+    def __iter__(self) -> Iterator[Category]:
+        return iter(sorted(self._by_name.values(), key=lambda category: category.name))
+    
+    def __len__(self) -> int:
+        return len(self._by_name)
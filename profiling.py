@@ -0,0 +1,234 @@
+"""
+Profiling hooks for Task Manager application.
+
+Code is instrumented with named spans that record nothing until the
+profiler is enabled, with the TASKMANAGER_PROFILE=1 environment
+variable, main.py --profile or the Tools menu. A disabled span costs
+one attribute check, so the hooks stay in the code.
+
+Recorded spans can be exported as a Chrome trace-event file, for
+chrome://tracing or ui.perfetto.dev, and are summarized per span name as
+p50/p99 durations over a rolling window of the latest runs.
+"""
+import functools
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+
+class _NullSpan:
+    """Span used while the profiler is disabled."""
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Span timing a with block."""
+    __slots__ = ('profiler', 'name', 'category', 'start')
+    
+    def __init__(self, profiler: 'Profiler', name: str, category: str):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+    
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, self.category, self.start,
+                             time.perf_counter_ns() - self.start)
+        return False
+
+
+class Profiler:
+    """Records named spans while enabled.
+    
+    Spans are kept in a bounded buffer for trace export, and the latest
+    durations of each span name in a rolling window for the summary.
+    Spans may be recorded from any thread.
+    
+    Phases are spans that start and end in different calls, like a
+    request whose result arrives later: begin() returns a token, which is
+    None while disabled, and end() records the phase.
+    """
+    MAX_EVENTS = 200000
+    WINDOW = 1000
+    
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._phase_ids = itertools.count(1)
+        self.reset()
+    
+    def reset(self):
+        """Drop everything recorded so far."""
+        with self._lock:
+            self._origin = time.perf_counter_ns()
+            # (name, category, thread id, start ns, duration ns, phase id or None)
+            self._events = deque(maxlen=self.MAX_EVENTS)
+            self._durations = {}  # name -> deque of the latest durations in ms
+            self._counts = {}  # name -> spans recorded
+            self._categories = {}  # name -> category
+            self._threads = {}  # thread id -> thread name
+    
+    def record(self, name: str, category: str, start_ns: int, duration_ns: int,
+               phase_id: int = None):
+        """Record a finished span."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            if thread_id not in self._threads:
+                self._threads[thread_id] = threading.current_thread().name
+            self._events.append((name, category, thread_id, start_ns, duration_ns, phase_id))
+            durations = self._durations.get(name)
+            if durations is None:
+                durations = self._durations[name] = deque(maxlen=self.WINDOW)
+                self._categories[name] = category
+                self._counts[name] = 0
+            durations.append(duration_ns / 1e6)
+            self._counts[name] += 1
+    
+    def span(self, name: str, category: str = 'app'):
+        """Get a context manager timing its block as a span."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category)
+    
+    def begin(self, name: str, category: str = 'phase') -> Optional[tuple]:
+        """Start a phase, getting the token to end it with."""
+        if not self.enabled:
+            return None
+        return (name, category, next(self._phase_ids), time.perf_counter_ns())
+    
+    def end(self, token: Optional[tuple]):
+        """End a phase started by begin()."""
+        if token is None:
+            return
+        name, category, phase_id, start = token
+        self.record(name, category, start, time.perf_counter_ns() - start, phase_id)
+    
+    @staticmethod
+    def _percentile(durations: List[float], fraction: float) -> float:
+        """Get the nearest-rank percentile of sorted durations."""
+        index = max(0, min(len(durations) - 1, int(round(fraction * len(durations))) - 1))
+        return durations[index]
+    
+    def summary(self) -> List[Dict]:
+        """Get count, p50, p99 and max of each span name over its rolling window."""
+        with self._lock:
+            windows = {name: sorted(durations) for name, durations in self._durations.items()}
+            counts = dict(self._counts)
+            categories = dict(self._categories)
+        
+        rows = []
+        for name, durations in windows.items():
+            rows.append({
+                'name': name,
+                'category': categories[name],
+                'count': counts[name],
+                'window': len(durations),
+                'p50_ms': self._percentile(durations, 0.50),
+                'p99_ms': self._percentile(durations, 0.99),
+                'max_ms': durations[-1],
+                'total_ms': sum(durations),
+            })
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
+    
+    def chrome_trace(self) -> Dict:
+        """Get the recorded spans as Chrome trace events.
+        
+        Spans are complete events on the track of their thread. Phases
+        may overlap, so they are async events grouped by category.
+        """
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+            origin = self._origin
+        
+        pid = os.getpid()
+        trace = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id,
+             'args': {'name': thread_name}}
+            for thread_id, thread_name in threads.items()
+        ]
+        for name, category, thread_id, start, duration, phase_id in events:
+            timestamp = (start - origin) / 1000
+            if phase_id is None:
+                trace.append({'name': name, 'cat': category, 'ph': 'X', 'pid': pid,
+                              'tid': thread_id, 'ts': timestamp, 'dur': duration / 1000})
+            else:
+                for phase, at in (('b', timestamp), ('e', timestamp + duration / 1000)):
+                    trace.append({'name': name, 'cat': category, 'ph': phase, 'pid': pid,
+                                  'tid': thread_id, 'ts': at, 'id': phase_id})
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+    
+    def export_chrome_trace(self, path: str) -> int:
+        """Write the recorded spans to a Chrome trace file, returning the event count."""
+        trace = self.chrome_trace()
+        with open(path + ".part", 'w', encoding='utf-8') as file:
+            json.dump(trace, file)
+        os.replace(path + ".part", path)
+        return len(trace['traceEvents'])
+
+
+profiler = Profiler(enabled=os.environ.get('TASKMANAGER_PROFILE') == '1')
+
+
+def span(name: str, category: str = 'app'):
+    """Time a with block as a span of the shared profiler."""
+    if not profiler.enabled:
+        return _NULL_SPAN
+    return _Span(profiler, name, category)
+
+
+def profiled(name: str = None, category: str = 'app') -> Callable:
+    """Decorate a function to record each call as a span, named after it by default.
+    
+    The wrapper takes any arguments, so PyQt passes it every argument of a
+    signal. Connect a decorated method through a lambda when the signal
+    carries arguments the method does not take.
+    """
+    def decorate(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.record(span_name, category, start, time.perf_counter_ns() - start)
+        return wrapper
+    return decorate
+
+
+def profile_methods(category: str) -> Callable:
+    """Class decorator recording calls of the public methods as spans.
+    
+    Static and class methods are left alone, and so are generators and
+    context managers, whose calls return before their work is done.
+    """
+    def decorate(cls):
+        for name, value in list(vars(cls).items()):
+            if (name.startswith('_') or not inspect.isfunction(value)
+                    or inspect.isgeneratorfunction(inspect.unwrap(value))):
+                continue
+            setattr(cls, name, profiled(f"{cls.__name__}.{name}", category)(value))
+        return cls
+    return decorate
@@ -0,0 +1,145 @@
+"""
+Task snapshot file for Task Manager application.
+Lets the first screen of tasks paint before the database is open.
+
+The snapshot is a columnar binary file: a header, fixed-width arrays of
+id, due time, priority and completed flag, then a table of offsets into
+a blob of UTF-8 strings. It is memory-mapped when read, and the arrays
+are used in place without being copied.
+"""
+import logging
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'TASKSNAP'
+VERSION = 1
+# magic, version, row count, string column count
+HEADER = struct.Struct('<8sIQI4x')
+
+STRING_COLUMNS = ('title', 'description', 'category', 'due_date', 'created_at', 'updated_at')
+NO_DUE = -(2 ** 63)  # due time of tasks without a due date
+
+
+def snapshot_path(db_name: str) -> Optional[str]:
+    """Get the snapshot file of a database, None for in-memory databases."""
+    if db_name == ':memory:':
+        return None
+    return db_name + ".snapshot"
+
+
+def _padded(size: int) -> int:
+    """Round a size up to keep the next array 8-byte aligned."""
+    return (size + 7) & ~7
+
+
+def write_snapshot(path: str, tasks: Iterable[Dict]):
+    """Write tasks to a snapshot file, replacing it once complete."""
+    tasks = list(tasks)
+    count = len(tasks)
+    
+    strings = bytearray()
+    offsets = [0]
+    for task in tasks:
+        for column in STRING_COLUMNS:
+            strings += (task.get(column) or "").encode('utf-8')
+            offsets.append(len(strings))
+    
+    def array(code: str, values) -> bytes:
+        data = struct.pack(f'<{len(values)}{code}', *values)
+        return data + bytes(_padded(len(data)) - len(data))
+    
+    with open(path + ".part", 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, count, len(STRING_COLUMNS)))
+        file.write(array('q', [task['id'] for task in tasks]))
+        file.write(array('q', [NO_DUE if task.get('due_ts') is None else task['due_ts']
+                               for task in tasks]))
+        file.write(array('b', [task['priority'] for task in tasks]))
+        file.write(array('b', [1 if task['completed'] else 0 for task in tasks]))
+        file.write(array('Q', offsets))
+        file.write(strings)
+    os.replace(path + ".part", path)
+
+
+class TaskSnapshot:
+    """Read-only view of a snapshot file mapped into memory."""
+    
+    def __init__(self, path: str):
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._view = memoryview(self._map)
+            magic, version, count, columns = HEADER.unpack_from(self._view)
+            if magic != MAGIC or version != VERSION or columns != len(STRING_COLUMNS):
+                raise ValueError(f"{path} is not a version {VERSION} task snapshot")
+            
+            position = HEADER.size
+            self.ids, position = self._array(position, 'q', count)
+            self.due_epochs, position = self._array(position, 'q', count)
+            self.priorities, position = self._array(position, 'b', count)
+            self.completed, position = self._array(position, 'b', count)
+            self._offsets, position = self._array(position, 'Q', count * columns + 1)
+            self._strings = self._view[position:]
+            if len(self._strings) != self._offsets[-1]:
+                raise ValueError(f"{path} is truncated")
+        except Exception:
+            self.close()
+            raise
+        self._count = count
+    
+    def _array(self, position: int, code: str, count: int):
+        """Get an array of count items at position, without copying it."""
+        size = struct.calcsize(code) * count
+        array = self._view[position:position + size].cast(code)
+        return array, position + _padded(size)
+    
+    @classmethod
+    def open(cls, path: str) -> Optional['TaskSnapshot']:
+        """Open a snapshot, or get None if it is missing or unreadable."""
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError, TypeError, struct.error) as error:
+            logger.warning("Ignoring task snapshot %s: %s", path, error)
+            return None
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def string(self, row: int, column: int) -> str:
+        """Decode one string of a row."""
+        index = row * len(STRING_COLUMNS) + column
+        return str(self._strings[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+    
+    def task(self, row: int) -> Dict:
+        """Build the task data of a row."""
+        task = {
+            'id': self.ids[row],
+            'priority': self.priorities[row],
+            'completed': self.completed[row],
+        }
+        for column, name in enumerate(STRING_COLUMNS):
+            task[name] = self.string(row, column)
+        # Missing dates were written as empty strings
+        task['due_date'] = task['due_date'] or None
+        due_ts = self.due_epochs[row]
+        task['due_ts'] = None if due_ts == NO_DUE else due_ts
+        return task
+    
+    def tasks(self, completed: bool) -> List[Dict]:
+        """Build the task data of the rows with the given completed flag."""
+        flag = 1 if completed else 0
+        return [self.task(row) for row in range(self._count) if self.completed[row] == flag]
+    
+    def close(self):
+        """Release the mapping."""
+        for name in ('ids', 'due_epochs', 'priorities', 'completed', '_offsets', '_strings'):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self._view.release()
+        self._map.close()
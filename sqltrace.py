@@ -0,0 +1,395 @@
+"""
+SQL statement tracing for Task Manager application.
+
+A tracer opens connections whose cursors time each statement, from
+execute until its last row is fetched, and counts the rows it returns.
+Statements are grouped by their normalized text, with literals replaced
+by placeholders, so every execution of a query shape adds to the same
+call count, row count and latency histogram.
+
+SQLite's progress handler counts the virtual machine steps each
+statement takes. The slow-query log keeps the statement text without its
+parameters, which may hold task text, unless the tracer is created with
+capture_parameters. Then SQLite's trace callback gives the statement
+with its parameters bound, and that is logged instead.
+
+Tracing is off unless a tracer is passed to the DatabaseManager, or
+TASKMANAGER_SQL_TRACE is set. Set it to 1 to log a report at exit, or to
+a .json path to also write the report there. TASKMANAGER_SLOW_QUERY_MS
+sets the slow-query threshold, and TASKMANAGER_SQL_PARAMETERS=1 turns on
+capture_parameters.
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \(\?(?:, \?)*\)", re.IGNORECASE)
+_VALUES_ROWS = re.compile(r"(\(\?(?:, \?)*\))(?:, \1)+")
+_UPDATE_SET = re.compile(r"^(UPDATE \S+ SET )(.+?)( WHERE .*)?$", re.IGNORECASE)
+_ASSIGNMENT = re.compile(r"^\w+ = \?$")
+
+
+@lru_cache(maxsize=4096)
+def normalize_sql(sql: str) -> str:
+    """Get the shape of a statement, the key its executions are grouped by.
+    
+    Whitespace is collapsed and literals become ?. Lists of
+    placeholders after IN, and repeated VALUES rows, shrink to one, and
+    the assignments of an UPDATE are sorted, so statements built from
+    the same columns in a different order share a shape.
+    """
+    sql = ' '.join(sql.split()).rstrip(';')
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _IN_LIST.sub("IN (?, ...)", sql)
+    sql = _VALUES_ROWS.sub(r"\1, ...", sql)
+    
+    match = _UPDATE_SET.match(sql)
+    if match:
+        assignments = match.group(2).split(', ')
+        if all(_ASSIGNMENT.match(assignment) for assignment in assignments):
+            sql = match.group(1) + ', '.join(sorted(assignments)) + (match.group(3) or '')
+    return sql
+
+
+class LatencyHistogram:
+    """Latencies counted in fixed buckets, from 50 microseconds to seconds."""
+    BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+    
+    def __init__(self):
+        # One more bucket for latencies above the last bound
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.max_ms = 0.0
+    
+    def add(self, ms: float):
+        """Count one latency."""
+        self.counts[bisect_left(self.BOUNDS_MS, ms)] += 1
+        if ms > self.max_ms:
+            self.max_ms = ms
+    
+    def percentile(self, fraction: float) -> float:
+        """Get the upper bound of the bucket holding a percentile, in ms."""
+        total = sum(self.counts)
+        if not total:
+            return 0.0
+        
+        rank = max(1, round(fraction * total))
+        seen = 0
+        for bound, count in zip(self.BOUNDS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+    
+    def buckets(self) -> Dict[str, int]:
+        """Get the non-empty buckets, keyed by their upper bound."""
+        labels = [f"<={bound}ms" for bound in self.BOUNDS_MS] + [f">{self.BOUNDS_MS[-1]}ms"]
+        return {label: count for label, count in zip(labels, self.counts) if count}
+
+
+class StatementStats:
+    """Totals of the executions of one statement shape."""
+    __slots__ = ('statement', 'calls', 'rows', 'total_ms', 'vm_steps', 'errors', 'histogram')
+    
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.calls = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.vm_steps = 0
+        self.errors = 0
+        self.histogram = LatencyHistogram()
+    
+    def to_dict(self) -> Dict:
+        """Get the totals as a report entry."""
+        return {
+            'statement': self.statement,
+            'calls': self.calls,
+            'rows': self.rows,
+            'total_ms': self.total_ms,
+            'mean_ms': self.total_ms / self.calls if self.calls else 0.0,
+            'p50_ms': self.histogram.percentile(0.50),
+            'p99_ms': self.histogram.percentile(0.99),
+            'max_ms': self.histogram.max_ms,
+            'vm_steps': self.vm_steps,
+            'errors': self.errors,
+            'histogram': self.histogram.buckets(),
+        }
+
+
+class _Execution:
+    """One execution of a statement, open until its cursor is done with it."""
+    __slots__ = ('sql', 'seconds', 'rows', 'vm_steps', 'expanded', 'failed')
+    
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.seconds = 0.0
+        self.rows = 0
+        self.vm_steps = 0
+        self.expanded = None  # statement with its parameters, if they are captured
+        self.failed = False
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor reporting each statement it runs to the tracer of its connection.
+    
+    Only the time spent inside execute and the fetch calls is counted,
+    not the time the caller takes between fetches.
+    """
+    _execution = None
+    
+    def _run(self, execution: _Execution, call, *args):
+        """Run a cursor call as part of an execution, adding its time."""
+        connection = self.connection
+        connection.running = execution
+        start = time.perf_counter()
+        try:
+            return call(*args)
+        except sqlite3.Error:
+            execution.failed = True
+            raise
+        finally:
+            execution.seconds += time.perf_counter() - start
+            connection.running = None
+    
+    def _finish(self):
+        """Report the open execution, if any."""
+        execution, self._execution = self._execution, None
+        if execution is not None:
+            self.connection.tracer.record(execution)
+    
+    def _start(self, sql: str, call, *args):
+        """Start a new execution of a statement."""
+        self._finish()
+        self._execution = execution = _Execution(sql)
+        try:
+            return self._run(execution, call, *args)
+        except sqlite3.Error:
+            self._finish()
+            raise
+    
+    def execute(self, sql, parameters=()):
+        return self._start(sql, super().execute, sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self._start(sql, super().executemany, sql, seq_of_parameters)
+    
+    def _fetched(self, call, *args):
+        """Run a fetch call, getting its rows, or the row of fetchone."""
+        execution = self._execution
+        if execution is None:
+            return call(*args)
+        return self._run(execution, call, *args)
+    
+    def fetchone(self):
+        row = self._fetched(super().fetchone)
+        if row is None:
+            self._finish()
+        elif self._execution is not None:
+            self._execution.rows += 1
+        return row
+    
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._fetched(super().fetchmany, size)
+        if self._execution is not None:
+            self._execution.rows += len(rows)
+            if len(rows) < size:
+                self._finish()
+        return rows
+    
+    def fetchall(self):
+        rows = self._fetched(super().fetchall)
+        if self._execution is not None:
+            self._execution.rows += len(rows)
+            self._finish()
+        return rows
+    
+    def __next__(self):
+        try:
+            row = self._fetched(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._execution is not None:
+            self._execution.rows += 1
+        return row
+    
+    def close(self):
+        self._finish()
+        super().close()
+    
+    def __del__(self):
+        # Statements that are never fetched, like most writes, end here
+        self._finish()
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose cursors are traced, opened by SqlTracer.connect."""
+    tracer = None
+    running = None  # execution whose statement is running
+    
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+    
+    def commit(self):
+        # Commits are not run through a cursor, but may well be the slowest statement
+        execution = _Execution("COMMIT")
+        start = time.perf_counter()
+        try:
+            super().commit()
+        except sqlite3.Error:
+            execution.failed = True
+            raise
+        finally:
+            execution.seconds = time.perf_counter() - start
+            self.tracer.record(execution)
+
+
+class SqlTracer:
+    """Per-statement call counts, rows and latency histograms, and a slow-query log.
+    
+    A tracer is shared by all connections it opens, on any thread.
+    """
+    PROGRESS_INTERVAL = 1000  # virtual machine steps between progress calls
+    SLOW_LOG_SIZE = 200
+    
+    def __init__(self, slow_ms: float = 100.0, capture_parameters: bool = False):
+        self.slow_ms = slow_ms  # executions slower than this are logged
+        self.capture_parameters = capture_parameters  # log slow queries with their parameters
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """Drop all statistics and the slow-query log."""
+        with self._lock:
+            self._statements = {}  # normalized statement -> StatementStats
+            self.slow_queries = deque(maxlen=self.SLOW_LOG_SIZE)
+    
+    def connect(self, database: str, **kwargs) -> sqlite3.Connection:
+        """Open a traced connection, taking the arguments of sqlite3.connect."""
+        conn = sqlite3.connect(database, factory=TracedConnection, **kwargs)
+        conn.tracer = self
+        
+        def trace(sql):
+            # Statements run by triggers are reported too, keep the first.
+            # The BEGIN sqlite3 runs before a write is reported first.
+            execution = conn.running
+            if (execution is not None and execution.expanded is None
+                    and sql.lstrip()[:6].upper() == execution.sql.lstrip()[:6].upper()):
+                execution.expanded = sql
+        
+        def progress():
+            execution = conn.running
+            if execution is not None:
+                execution.vm_steps += self.PROGRESS_INTERVAL
+            return 0
+        
+        if self.capture_parameters:
+            conn.set_trace_callback(trace)
+        conn.set_progress_handler(progress, self.PROGRESS_INTERVAL)
+        return conn
+    
+    def record(self, execution: _Execution):
+        """Add a finished execution to the statistics of its statement."""
+        statement = normalize_sql(execution.sql)
+        ms = execution.seconds * 1000
+        with self._lock:
+            stats = self._statements.get(statement)
+            if stats is None:
+                stats = self._statements[statement] = StatementStats(statement)
+            stats.calls += 1
+            stats.rows += execution.rows
+            stats.total_ms += ms
+            stats.vm_steps += execution.vm_steps
+            stats.errors += execution.failed
+            stats.histogram.add(ms)
+            slow = ms >= self.slow_ms
+            if slow:
+                self.slow_queries.append({
+                    'at': datetime.now().isoformat(timespec='milliseconds'),
+                    'ms': ms,
+                    'rows': execution.rows,
+                    'statement': statement,
+                    'sql': execution.expanded or ' '.join(execution.sql.split()),
+                    'thread': threading.current_thread().name,
+                })
+        if slow:
+            # Parameters are left out of the log output even when captured
+            logger.warning("Slow query, %.1f ms for %d rows: %s", ms, execution.rows, statement)
+    
+    def statistics(self) -> List[Dict]:
+        """Get the statistics of each statement, most total time first."""
+        with self._lock:
+            report = [stats.to_dict() for stats in self._statements.values()]
+        report.sort(key=lambda entry: entry['total_ms'], reverse=True)
+        return report
+    
+    def report(self) -> Dict:
+        """Get the statement statistics and the slow-query log."""
+        with self._lock:
+            slow_queries = list(self.slow_queries)
+        return {
+            'slow_ms': self.slow_ms,
+            'statements': self.statistics(),
+            'slow_queries': slow_queries,
+        }
+    
+    def format_report(self, limit: int = 20) -> str:
+        """Format the statements taking the most total time as a table."""
+        lines = [f"{'calls':>8} {'rows':>10} {'total ms':>10} {'p50 ms':>8} "
+                 f"{'p99 ms':>8} {'max ms':>9}  statement"]
+        for entry in self.statistics()[:limit]:
+            lines.append(f"{entry['calls']:>8} {entry['rows']:>10} {entry['total_ms']:>10.1f} "
+                         f"{entry['p50_ms']:>8.2f} {entry['p99_ms']:>8.2f} "
+                         f"{entry['max_ms']:>9.2f}  {entry['statement'][:120]}")
+        lines.append(f"{len(self.slow_queries)} queries slower than {self.slow_ms:g} ms")
+        return '\n'.join(lines)
+    
+    def write_report(self, path: str):
+        """Write the report to a JSON file."""
+        with open(path + ".part", 'w', encoding='utf-8') as file:
+            json.dump(self.report(), file, indent=2)
+        os.replace(path + ".part", path)
+
+
+def tracer_from_environment() -> Optional[SqlTracer]:
+    """Create the tracer TASKMANAGER_SQL_TRACE asks for, if any."""
+    if not os.environ.get('TASKMANAGER_SQL_TRACE'):
+        return None
+    return SqlTracer(float(os.environ.get('TASKMANAGER_SLOW_QUERY_MS', 100.0)),
+                     capture_parameters=os.environ.get('TASKMANAGER_SQL_PARAMETERS') == '1')
+
+
+# Tracer of the database managers created without one
+tracer = tracer_from_environment()
+
+
+def report_at_exit():
+    """Log the report of the environment tracer, and write it if a path was given."""
+    if tracer is None:
+        return
+    logger.info("SQL statements by total time:\n%s", tracer.format_report())
+    path = os.environ['TASKMANAGER_SQL_TRACE']
+    if path.endswith('.json'):
+        tracer.write_report(path)
+        logger.info("SQL trace report written to %s", path)
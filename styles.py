@@ -1,6 +1,53 @@
 """
 Stylesheet definitions for Task Manager application.
+
+One stylesheet is set on the application. Widgets that change look with
+their state select rules through dynamic properties, such as
+QFrame[role="stat-card"][alert="true"], instead of carrying a stylesheet
+each. Task rows are painted by a delegate, which takes its colors from
+TASK_ROW_COLORS.
 """
+from functools import lru_cache
+
+from PyQt6.QtWidgets import QWidget
+
+from profiling import profiled
+
+PRIORITY_COLORS = {1: "#e74c3c", 2: "#f39c12", 3: "#2ecc71"}
+STAT_COLORS = {
+    'total': "#3498db",
+    'pending': "#f39c12",
+    'completed': "#2ecc71",
+    'high_priority': "#e74c3c",
+    'overdue': "#9b59b6"
+}
+
+# Colors of the painted task rows in the light and dark theme. Cards have
+# a background and border color per state.
+TASK_ROW_COLORS = {
+    False: {
+        'cards': {
+            'completed': ("#f8f9fa", "#dee2e6"),
+            'overdue': ("#fff5f5", "#e74c3c"),
+            'hovered': ("#f8fafc", "#3498db"),
+            'normal': ("white", "#dee2e6"),
+        },
+        'text': "#2c3e50",
+        'muted': "#666",
+        'completed': "#999",
+    },
+    True: {
+        'cards': {
+            'completed': ("#262626", "#444444"),
+            'overdue': ("#3a2424", "#e74c3c"),
+            'hovered': ("#333a42", "#3498db"),
+            'normal': ("#2d2d2d", "#555555"),
+        },
+        'text': "#ffffff",
+        'muted': "#aaaaaa",
+        'completed': "#777777",
+    },
+}
 
 MAIN_STYLESHEET = """
 /* Main window styling */
@@ -293,4 +340,97 @@ QMenu {
     background-color: #2d2d2d;
     border: 1px solid #555555;
 }
-"""
\ No newline at end of file
+"""
+
+WIDGET_STYLESHEET = """
+/* Statistic cards */
+QFrame[role="stat-card"] {
+    background-color: white;
+    border: 1px solid #dee2e6;
+    border-radius: 8px;
+}
+
+QFrame[role="stat-card"][alert="true"] {
+    background-color: #fff5f5;
+}
+
+QLabel[role="stat-title"] {
+    color: #666;
+    font-size: 11px;
+}
+
+/* Main window buttons */
+QPushButton#clearSearchButton {
+    background-color: #95a5a6;
+    color: white;
+    padding: 8px 12px;
+    border-radius: 4px;
+}
+
+QPushButton#clearSearchButton:hover {
+    background-color: #7f8c8d;
+}
+
+QPushButton#clearSearchButton[active="true"] {
+    background-color: #3498db;
+}
+
+QPushButton#clearSearchButton[active="true"]:hover {
+    background-color: #2980b9;
+}
+
+QPushButton#clearCompletedButton {
+    background-color: #e74c3c;
+    color: white;
+    padding: 10px;
+    font-weight: bold;
+}
+
+QPushButton#clearCompletedButton:hover {
+    background-color: #c0392b;
+}
+
+QLabel#statisticsText {
+    font-family: monospace;
+    padding: 20px;
+}
+"""
+
+
+def color_rules() -> str:
+    """Build the rules that color the statistic cards."""
+    rules = []
+    for stat, color in STAT_COLORS.items():
+        rules.append(f'QFrame[role="stat-card"][stat="{stat}"] '
+                     f'{{ border-top: 4px solid {color}; }}')
+        rules.append(f'QLabel[role="stat-value"][stat="{stat}"] {{ color: {color}; }}')
+    return "\n".join(rules) + "\n"
+
+
+@lru_cache(maxsize=None)
+def application_stylesheet(dark: bool = False) -> str:
+    """Get the stylesheet of the whole application, built once per theme."""
+    theme = DARK_STYLESHEET if dark else MAIN_STYLESHEET
+    return theme + WIDGET_STYLESHEET + color_rules()
+
+
+@profiled(category='style')
+def restyle(widget: QWidget, **properties):
+    """Set style properties of a widget and re-polish it if any changed.
+    
+    Only the widget and its children are polished again, the rest of
+    the application keeps its computed styles.
+    """
+    changed = False
+    for name, value in properties.items():
+        if widget.property(name) != value:
+            widget.setProperty(name, value)
+            changed = True
+    if not changed:
+        return
+    
+    style = widget.style()
+    for target in [widget] + widget.findChildren(QWidget):
+        style.unpolish(target)
+        style.polish(target)
+    widget.update()
@@ -0,0 +1,9 @@
+"""
+Test setup for Task Manager application.
+"""
+import os
+import sys
+
+# Windows are never shown, and the modules are imported from the repository root
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,39 @@
+"""
+Tests of the database manager.
+"""
+import os
+
+import pytest
+
+from database import DatabaseManager, OperationCancelled
+
+
+def test_query_plans_use_indexes(tmp_path):
+    db = DatabaseManager(os.path.join(tmp_path, "tasks.db"), 'test')
+    try:
+        db.add_tasks(
+            {'title': f"Task {number}", 'description': "description " * 5,
+             'priority': 1 + number % 3, 'due_date': f"2026-01-{1 + number % 28:02d}",
+             'completed': number % 4 == 0, 'category': ("Work", "Home", "")[number % 3]}
+            for number in range(2000)
+        )
+        
+        assert db.check_query_plans() == []
+    finally:
+        db.close()
+
+
+def test_import_cancelled_before_last_batch(tmp_path):
+    path = os.path.join(tmp_path, "tasks.jsonl")
+    with open(path, 'w', encoding='utf-8') as file:
+        for number in range(10):
+            file.write(f'{{"record": "task", "title": "Task {number}"}}\n')
+    
+    db = DatabaseManager(os.path.join(tmp_path, "tasks.db"), 'test')
+    try:
+        with pytest.raises(OperationCancelled):
+            db.import_tasks(path, batch_size=4, cancelled=lambda: len(db.get_tasks()) >= 8)
+        
+        assert len(db.get_tasks()) == 8
+    finally:
+        db.close()
@@ -0,0 +1,59 @@
+"""
+Tests of the database thread.
+"""
+import os
+
+from PyQt6.QtCore import QCoreApplication, QEventLoop, QTimer
+
+from database import STORAGE_PROFILES
+from workers import DatabaseThread
+
+
+def run_until(done, timeout_ms: int = 30000):
+    """Run the event loop until done() is true, delivering the callbacks."""
+    loop = QEventLoop()
+    timer = QTimer()
+    timer.timeout.connect(lambda: done() and loop.quit())
+    timer.start(5)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec()
+    timer.stop()
+
+
+def test_requests_stay_within_latency_budget(tmp_path):
+    app = QCoreApplication.instance() or QCoreApplication([])
+    db = DatabaseThread(os.path.join(tmp_path, "tasks.db"), STORAGE_PROFILES['test'])
+    db.start()
+    try:
+        results = []
+        for number in range(200):
+            db.submit('add_task', f"Task {number}", "description " * 50,
+                      callback=results.append)
+            if number % 10 == 0:
+                db.read('get_tasks', callback=results.append)
+        db.read('get_task_statistics', callback=results.append)
+        
+        run_until(lambda: len(results) == 221)
+        
+        assert len(results) == 221
+        statistics = [result for result in results if isinstance(result, dict)]
+        assert statistics[0]['total'] == 200
+        assert db.within_budget(), f"GUI thread blocked {db.max_gui_block_ms:.1f} ms"
+    finally:
+        db.stop()
+
+
+def test_requests_after_stop_are_cancelled(tmp_path):
+    app = QCoreApplication.instance() or QCoreApplication([])
+    db = DatabaseThread(os.path.join(tmp_path, "tasks.db"), STORAGE_PROFILES['test'])
+    db.start()
+    # A write whose callback reads, delivered only after the thread stopped
+    reads = []
+    db.submit('add_task', "Task", callback=lambda task_id: reads.append(
+        db.read('get_task_statistics', callback=reads.append)))
+    db.stop()
+    
+    run_until(lambda: reads)
+    
+    assert len(reads) == 1 and reads[0].cancelled()
+    assert db.submit('get_tasks').cancelled()
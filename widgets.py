@@ -1,202 +1,535 @@
 """
 Custom widgets for Task Manager application.
 """
+import heapq
+import math
+import time
+from bisect import bisect_left
+from typing import Optional
+
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QCheckBox, QFrame, QSizePolicy
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame,
+    QSizePolicy, QStyle, QStyledItemDelegate, QStyleOptionButton
+)
+from PyQt6.QtCore import (
+    Qt, pyqtSignal, QAbstractListModel, QModelIndex, QObject, QRect, QSize, QEvent, QTimer
 )
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QFont, QColor
+from PyQt6.QtGui import QFont, QColor, QFontMetrics, QPainter, QPen
+
+from models import CategoryRegistry
+from profiling import profiled
+from styles import PRIORITY_COLORS, TASK_ROW_COLORS, restyle
+
+class TaskListModel(QAbstractListModel):
+    """List model holding the task rows shown in a task view."""
+    TaskRole = Qt.ItemDataRole.UserRole + 1
+    PAGE_SIZE = 200
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._tasks = []
+        self._keys = []  # sort keys kept parallel to _tasks
+        self._key_by_id = {}
+        self._fetch_page = None  # callable(after, limit, callback)
+        self._exhausted = True
+        self._fetching = False
+        self._preview = False  # rows are shown until the first page arrives
+        self._source = object()  # identifies the current source
+    
+    @staticmethod
+    def sort_key(task: dict) -> tuple:
+        """Get sort key matching the database ordering of tasks."""
+        due_ts = task.get('due_ts')
+        # Tasks without a due date come first, as in SQLite
+        return (task['priority'], -math.inf if due_ts is None else due_ts, task['id'])
+    
+    def rowCount(self, parent=QModelIndex()) -> int:
+        """Return number of tasks in the model."""
+        if parent.isValid():
+            return 0
+        return len(self._tasks)
+    
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        """Return task data for the given index and role."""
+        if not index.isValid() or index.row() >= len(self._tasks):
+            return None
+        
+        task = self._tasks[index.row()]
+        if role == self.TaskRole:
+            return task
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return task['title']
+        return None
+    
+    def set_tasks(self, tasks: list):
+        """Replace all tasks in the model."""
+        self.beginResetModel()
+        self._set_rows(sorted(tasks, key=self.sort_key))
+        self._fetch_page = None
+        self._exhausted = True
+        self._fetching = False
+        self._preview = False
+        self._source = object()
+        self.endResetModel()
+    
+    @profiled(category='model')
+    def set_source(self, fetch_page, preview: list = None):
+        """Load tasks lazily, one page at a time, as the view scrolls.
+        
+        fetch_page is called with the (priority, due_ts, id) key of the
+        last loaded task, or None, the page size and a callback taking the
+        fetched tasks. It may deliver the page asynchronously.
+        
+        preview tasks, like those of a snapshot, are shown until the first
+        page arrives and are then reconciled with it.
+        """
+        self.beginResetModel()
+        self._set_rows(sorted(preview or [], key=self.sort_key))
+        self._fetch_page = fetch_page
+        self._exhausted = False
+        self._fetching = False
+        self._preview = bool(preview)
+        self._source = object()
+        self.endResetModel()
+        self.fetchMore()
+    
+    def _set_rows(self, tasks: list):
+        """Set the rows and their sort keys, tasks must be sorted."""
+        self._tasks = tasks
+        self._keys = [self.sort_key(task) for task in tasks]
+        self._key_by_id = {task['id']: key for task, key in zip(tasks, self._keys)}
+    
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        """Check if more tasks can be loaded from the source."""
+        return not parent.isValid() and not self._exhausted and not self._fetching
+    
+    def fetchMore(self, parent=QModelIndex()):
+        """Request the next page of tasks from the source."""
+        if parent.isValid() or self._exhausted or self._fetching:
+            return
+        
+        after = None
+        if self._tasks and not self._preview:
+            last = self._tasks[-1]
+            after = (last['priority'], last.get('due_ts'), last['id'])
+        
+        self._fetching = True
+        source = self._source
+        self._fetch_page(after, self.PAGE_SIZE,
+                         lambda tasks: self._append_page(source, tasks))
+    
+    @profiled(category='model')
+    def _append_page(self, source, tasks: list):
+        """Append a fetched page of tasks."""
+        if source is not self._source:
+            # Page of a source that has been replaced since
+            return
+        
+        self._fetching = False
+        if len(tasks) < self.PAGE_SIZE:
+            self._exhausted = True
+        
+        if self._preview:
+            self._reconcile(tasks)
+            return
+        
+        # Skip tasks that were inserted while the page was in flight
+        tasks = [task for task in tasks if task['id'] not in self._key_by_id]
+        if not tasks:
+            return
+        
+        first = len(self._tasks)
+        self.beginInsertRows(QModelIndex(), first, first + len(tasks) - 1)
+        for task in tasks:
+            key = self.sort_key(task)
+            self._tasks.append(task)
+            self._keys.append(key)
+            self._key_by_id[task['id']] = key
+        self.endInsertRows()
+    
+    def _reconcile(self, tasks: list):
+        """Replace the preview rows with the first page of the source."""
+        self._preview = False
+        if [task['id'] for task in tasks] == [task['id'] for task in self._tasks]:
+            # Same rows in the same order, only their data may differ
+            self._set_rows(tasks)
+            if tasks:
+                self.dataChanged.emit(self.index(0), self.index(len(tasks) - 1))
+            return
+        
+        self.beginResetModel()
+        self._set_rows(tasks)
+        self.endResetModel()
+    
+    def task_at(self, row: int) -> dict:
+        """Get task data at row."""
+        return self._tasks[row]
+    
+    def find_row(self, task_id: int) -> int:
+        """Get row of a task, or -1 if it is not in the model."""
+        key = self._key_by_id.get(task_id)
+        if key is None:
+            return -1
+        return bisect_left(self._keys, key)
+    
+    def get_task(self, task_id: int) -> Optional[dict]:
+        """Get task data by id, or None if it is not in the model."""
+        row = self.find_row(task_id)
+        return self._tasks[row] if row >= 0 else None
+    
+    def insert_task(self, task: dict) -> int:
+        """Insert a task at its sorted position and return its row, or -1."""
+        key = self.sort_key(task)
+        if not self._exhausted and (not self._keys or key > self._keys[-1]):
+            # Not loaded yet, the task arrives with a later page
+            return -1
+        row = bisect_left(self._keys, key)
+        
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._tasks.insert(row, task)
+        self._keys.insert(row, key)
+        self._key_by_id[task['id']] = key
+        self.endInsertRows()
+        return row
+    
+    def remove_task(self, task_id: int) -> Optional[dict]:
+        """Remove a task from the model and return its data."""
+        row = self.find_row(task_id)
+        if row < 0:
+            return None
+        
+        self.beginRemoveRows(QModelIndex(), row, row)
+        task = self._tasks.pop(row)
+        del self._keys[row]
+        del self._key_by_id[task_id]
+        self.endRemoveRows()
+        return task
+    
+    def update_task(self, task: dict):
+        """Replace the data of a task already in the model."""
+        row = self.find_row(task['id'])
+        if row < 0:
+            return
+        
+        if self.sort_key(task) != self._keys[row]:
+            # Sort position changed, move the row
+            self.remove_task(task['id'])
+            self.insert_task(task)
+            return
+        
+        self._tasks[row] = task
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+class OverdueScheduler(QObject):
+    """Repaints task rows as their due times pass.
+    
+    Keeps a min-heap of the future due times of the tasks in a model and
+    a single timer armed for the earliest. When it fires, only the rows
+    that just became overdue are repainted. Entries of tasks that have
+    changed or left the model since are skipped when they come up.
+    
+    A deadline of tasks that are not loaded, like the next due time in
+    the database, can be added with schedule().
+    """
+    became_overdue = pyqtSignal(list)  # ids of the loaded tasks now overdue
+    
+    MAX_INTERVAL_MS = 24 * 60 * 60 * 1000  # longer waits are split up
+    DEADLINE = 0  # task id of deadline entries, task ids start at 1
+    
+    def __init__(self, model: TaskListModel, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self._heap = []  # (due_ts, task_id)
+        self._deadline = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._fire)
+        
+        model.modelReset.connect(self._rebuild)
+        model.rowsInserted.connect(lambda parent, first, last: self._add_rows(first, last))
+        model.dataChanged.connect(
+            lambda top, bottom: self._add_rows(top.row(), bottom.row()))
+        self._rebuild()
+    
+    def schedule(self, due_ts: int):
+        """Fire became_overdue once due_ts has passed."""
+        if due_ts == self._deadline:
+            return
+        self._deadline = due_ts
+        heapq.heappush(self._heap, (due_ts, self.DEADLINE))
+        self._arm()
+    
+    def _add_rows(self, first: int, last: int):
+        """Add the due times of rows that are still in the future."""
+        now = time.time()
+        for row in range(first, last + 1):
+            task = self.model.task_at(row)
+            due_ts = task.get('due_ts')
+            if due_ts is not None and due_ts >= now and not task['completed']:
+                heapq.heappush(self._heap, (due_ts, task['id']))
+        
+        # Changed rows leave stale entries behind, drop them now and then
+        if len(self._heap) > 2 * self.model.rowCount() + 64:
+            self._rebuild()
+            return
+        self._arm()
+    
+    def _rebuild(self):
+        """Rebuild the heap from all rows of the model."""
+        self._heap = [] if self._deadline is None else [(self._deadline, self.DEADLINE)]
+        self._add_rows(0, self.model.rowCount() - 1)
+    
+    def _arm(self):
+        """Arm the timer for the earliest due time."""
+        if not self._heap:
+            self._timer.stop()
+            return
+        # Rows are overdue once the time is past their due time
+        delay = (self._heap[0][0] - time.time()) * 1000 + 1
+        self._timer.start(int(min(max(delay, 0), self.MAX_INTERVAL_MS)))
+    
+    def _fire(self):
+        """Repaint the rows whose due time has passed."""
+        now = time.time()
+        overdue = []
+        deadline_passed = False
+        while self._heap and self._heap[0][0] < now:
+            due_ts, task_id = heapq.heappop(self._heap)
+            if task_id == self.DEADLINE:
+                deadline_passed = deadline_passed or due_ts == self._deadline
+                continue
+            
+            row = self.model.find_row(task_id)
+            if row < 0:
+                continue
+            task = self.model.task_at(row)
+            if task.get('due_ts') == due_ts and not task['completed']:
+                overdue.append(task_id)
+                index = self.model.index(row)
+                self.model.dataChanged.emit(index, index)
+        
+        if deadline_passed:
+            self._deadline = None
+        if overdue or deadline_passed:
+            self.became_overdue.emit(overdue)
+        self._arm()
 
-class TaskWidget(QFrame):
-    """Custom widget for displaying a single task."""
+class TaskItemDelegate(QStyledItemDelegate):
+    """Delegate that paints task rows and handles their actions."""
     task_updated = pyqtSignal(int, dict)  # task_id, changes
     task_deleted = pyqtSignal(int)  # task_id
     
-    def __init__(self, task_data: dict):
-        super().__init__()
-        self.task_id = task_data['id']
-        self.task_data = task_data
-        self.init_ui()
-        self.setup_styles()
+    ROW_HEIGHT = 86
+    ACTIONS_WIDTH = 110
     
-    def init_ui(self):
-        """Initialize UI components."""
-        self.setFrameStyle(QFrame.Shape.StyledPanel | QFrame.Shadow.Raised)
-        self.setMinimumHeight(80)
+    PRIORITY_COLORS = PRIORITY_COLORS
+    
+    def __init__(self, parent=None, categories: CategoryRegistry = None):
+        super().__init__(parent)
+        self.categories = categories if categories is not None else CategoryRegistry()
+        # Colors are parsed once rather than on every paint
+        self.set_theme(dark=False)
+        self.priority_colors = {priority: QColor(color)
+                                for priority, color in self.PRIORITY_COLORS.items()}
+        self.category_colors = {}  # color name -> QColor, filled as categories are painted
+        self.white = QColor("white")
+        self.delete_color = QColor("#e74c3c")
+        self.delete_hover_color = QColor("#c0392b")
+        self.title_font = QFont()
+        self.title_font.setBold(True)
+        self.title_font.setPointSize(11)
+        self.small_font = QFont()
+        self.small_font.setPixelSize(10)
+        self.pill_font = QFont()
+        self.pill_font.setPixelSize(9)
+    
+    def set_theme(self, dark: bool):
+        """Paint rows with the colors of the light or dark theme."""
+        colors = TASK_ROW_COLORS[dark]
+        self.card_colors = {state: (QColor(background), QPen(QColor(border), 1))
+                            for state, (background, border) in colors['cards'].items()}
+        self.text_color = QColor(colors['text'])
+        self.muted_color = QColor(colors['muted'])
+        self.completed_color = QColor(colors['completed'])
+    
+    def sizeHint(self, option, index) -> QSize:
+        """Return fixed row size so views can use uniform item sizes."""
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+    
+    def card_rect(self, rect: QRect) -> QRect:
+        """Get card rectangle inside the row rectangle."""
+        return rect.adjusted(4, 3, -4, -3)
+    
+    def checkbox_rect(self, rect: QRect) -> QRect:
+        """Get rectangle of the complete checkbox."""
+        card = self.card_rect(rect)
+        return QRect(card.right() - self.ACTIONS_WIDTH, card.top() + 12,
+                     self.ACTIONS_WIDTH - 12, 24)
+    
+    def delete_rect(self, rect: QRect) -> QRect:
+        """Get rectangle of the delete button."""
+        card = self.card_rect(rect)
+        return QRect(card.right() - self.ACTIONS_WIDTH, card.bottom() - 34,
+                     self.ACTIONS_WIDTH - 12, 24)
+    
+    def category_color(self, category: str) -> QColor:
+        """Get the pill color of a category."""
+        color = self.categories.color_of(category)
+        qcolor = self.category_colors.get(color)
+        if qcolor is None:
+            qcolor = self.category_colors[color] = QColor(color)
+        return qcolor
+    
+    def is_overdue(self, task: dict) -> bool:
+        """Check if task is overdue."""
+        due_ts = task.get('due_ts')
+        if due_ts is None or task['completed']:
+            return False
         
-        main_layout = QHBoxLayout()
+        return due_ts < time.time()
+    
+    @profiled(category='paint')
+    def paint(self, painter: QPainter, option, index):
+        """Paint a single task row."""
+        task = index.data(TaskListModel.TaskRole)
+        if task is None:
+            return
         
-        # Left side: Checkbox and task info
-        left_widget = QWidget()
-        left_layout = QVBoxLayout(left_widget)
-        left_layout.setContentsMargins(10, 5, 5, 5)
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
-        # Title with priority indicator
-        title_layout = QHBoxLayout()
+        card = self.card_rect(option.rect)
+        completed = bool(task['completed'])
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
         
-        # Priority indicator
-        priority_color = {
-            1: "#e74c3c", 2: "#f39c12", 3: "#2ecc71"
-        }.get(self.task_data['priority'], "#f39c12")
+        # Card background
+        if completed:
+            state = 'completed'
+        elif self.is_overdue(task):
+            state = 'overdue'
+        elif hovered:
+            state = 'hovered'
+        else:
+            state = 'normal'
+        background, border = self.card_colors[state]
+        painter.setPen(border)
+        painter.setBrush(background)
+        painter.drawRoundedRect(card, 5, 5)
         
-        priority_label = QLabel("●")
-        priority_label.setStyleSheet(f"color: {priority_color}; font-size: 16px;")
-        title_layout.addWidget(priority_label)
+        text_color = self.completed_color if completed else self.text_color
+        muted_color = self.completed_color if completed else self.muted_color
+        left = card.left() + 12
+        text_width = card.width() - self.ACTIONS_WIDTH - 30
         
-        # Title
-        title_label = QLabel(self.task_data['title'])
-        title_font = QFont()
-        title_font.setBold(True)
-        title_font.setPointSize(11)
-        title_label.setFont(title_font)
-        title_layout.addWidget(title_label)
-        title_layout.addStretch()
+        # Priority indicator
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.priority_colors.get(task['priority'], self.priority_colors[2]))
+        painter.drawEllipse(QRect(left, card.top() + 14, 10, 10))
         
-        left_layout.addLayout(title_layout)
+        # Title
+        title_font = QFont(self.title_font)
+        title_font.setStrikeOut(completed)
+        painter.setFont(title_font)
+        painter.setPen(text_color)
+        title_rect = QRect(left + 18, card.top() + 8, text_width - 18, 22)
+        title = QFontMetrics(title_font).elidedText(
+            task['title'], Qt.TextElideMode.ElideRight, title_rect.width())
+        painter.drawText(title_rect, Qt.AlignmentFlag.AlignVCenter, title)
         
         # Description
-        if self.task_data.get('description'):
-            desc_label = QLabel(self.task_data['description'])
-            desc_label.setWordWrap(True)
-            desc_label.setStyleSheet("color: #666; font-size: 10px;")
-            left_layout.addWidget(desc_label)
-        
-        # Category and due date
-        info_layout = QHBoxLayout()
-        
-        # Category
-        category_label = QLabel(self.task_data.get('category', 'General'))
-        category_label.setStyleSheet(f"""
-            background-color: {self.get_category_color(self.task_data.get('category'))};
-            color: white;
-            padding: 2px 8px;
-            border-radius: 10px;
-            font-size: 9px;
-        """)
-        info_layout.addWidget(category_label)
+        small_font = QFont(self.small_font)
+        small_font.setStrikeOut(completed)
+        painter.setFont(small_font)
+        painter.setPen(muted_color)
+        if task.get('description'):
+            desc_rect = QRect(left, card.top() + 32, text_width, 16)
+            description = QFontMetrics(small_font).elidedText(
+                task['description'].replace('\n', ' '),
+                Qt.TextElideMode.ElideRight, desc_rect.width())
+            painter.drawText(desc_rect, Qt.AlignmentFlag.AlignVCenter, description)
         
-        # Due date
-        if self.task_data.get('due_date'):
-            due_date = self.task_data['due_date'][:10]  # Just show date
-            due_label = QLabel(f"📅 {due_date}")
-            due_label.setStyleSheet("color: #666; font-size: 9px;")
-            info_layout.addWidget(due_label)
-        
-        info_layout.addStretch()
-        left_layout.addLayout(info_layout)
+        # Category pill
+        category = task.get('category') or 'General'
+        painter.setFont(self.pill_font)
+        pill_width = QFontMetrics(self.pill_font).horizontalAdvance(category) + 16
+        pill_rect = QRect(left, card.bottom() - 26, pill_width, 18)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.category_color(category))
+        painter.drawRoundedRect(pill_rect, 9, 9)
+        painter.setPen(self.white)
+        painter.drawText(pill_rect, Qt.AlignmentFlag.AlignCenter, category)
         
-        # Right side: Action buttons
-        right_widget = QWidget()
-        right_layout = QVBoxLayout(right_widget)
-        right_layout.setContentsMargins(5, 5, 10, 5)
-        right_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        # Due date
+        if task.get('due_date'):
+            painter.setPen(muted_color)
+            due_rect = QRect(pill_rect.right() + 10, pill_rect.top(), 120, 18)
+            painter.drawText(due_rect, Qt.AlignmentFlag.AlignVCenter,
+                             f"📅 {task['due_date'][:10]}")
         
         # Complete checkbox
-        self.complete_checkbox = QCheckBox("Complete")
-        self.complete_checkbox.setChecked(bool(self.task_data['completed']))
-        self.complete_checkbox.stateChanged.connect(self.toggle_complete)
-        right_layout.addWidget(self.complete_checkbox)
+        checkbox = QStyleOptionButton()
+        checkbox.rect = self.checkbox_rect(option.rect)
+        checkbox.text = "Complete"
+        checkbox.state = QStyle.StateFlag.State_Enabled | (
+            QStyle.StateFlag.State_On if completed else QStyle.StateFlag.State_Off)
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_CheckBox, checkbox, painter, option.widget)
         
         # Delete button
-        delete_btn = QPushButton("Delete")
-        delete_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #e74c3c;
-                color: white;
-                border: none;
-                padding: 5px 10px;
-                border-radius: 3px;
-                font-size: 10px;
-            }
-            QPushButton:hover {
-                background-color: #c0392b;
-            }
-        """)
-        delete_btn.clicked.connect(self.delete_task)
-        right_layout.addWidget(delete_btn)
-        
-        # Add widgets to main layout
-        main_layout.addWidget(left_widget, 4)
-        main_layout.addWidget(right_widget, 1)
-        
-        self.setLayout(main_layout)
-    
-    def get_category_color(self, category_name: str) -> str:
-        """Get color for category."""
-        category_colors = {
-            'Work': '#e74c3c',
-            'Personal': '#2ecc71',
-            'Shopping': '#f39c12',
-            'Health': '#9b59b6',
-            'Finance': '#1abc9c',
-            'General': '#3498db'
-        }
-        return category_colors.get(category_name, '#3498db')
-    
-    def setup_styles(self):
-        """Setup widget styles."""
-        if self.task_data['completed']:
-            self.setStyleSheet("""
-                QFrame {
-                    background-color: #f8f9fa;
-                    border: 1px solid #dee2e6;
-                    border-radius: 5px;
-                }
-                QLabel {
-                    color: #999 !important;
-                    text-decoration: line-through;
-                }
-            """)
-        elif self.task_data.get('due_date') and self.is_overdue():
-            self.setStyleSheet("""
-                QFrame {
-                    background-color: #fff5f5;
-                    border: 1px solid #e74c3c;
-                    border-radius: 5px;
-                }
-            """)
-        else:
-            self.setStyleSheet("""
-                QFrame {
-                    background-color: white;
-                    border: 1px solid #dee2e6;
-                    border-radius: 5px;
-                }
-                QFrame:hover {
-                    border-color: #3498db;
-                    background-color: #f8fafc;
-                }
-            """)
-    
-    def is_overdue(self) -> bool:
-        """Check if task is overdue."""
-        if not self.task_data.get('due_date'):
+        delete_rect = self.delete_rect(option.rect)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.delete_hover_color if hovered else self.delete_color)
+        painter.drawRoundedRect(delete_rect, 3, 3)
+        painter.setFont(self.small_font)
+        painter.setPen(self.white)
+        painter.drawText(delete_rect, Qt.AlignmentFlag.AlignCenter, "Delete")
+        
+        painter.restore()
+    
+    def editorEvent(self, event, model, option, index) -> bool:
+        """Handle clicks on the complete checkbox and delete button."""
+        if (event.type() != QEvent.Type.MouseButtonRelease
+                or event.button() != Qt.MouseButton.LeftButton):
             return False
         
-        from datetime import datetime
-        try:
-            due = datetime.fromisoformat(self.task_data['due_date'])
-            return due < datetime.now() and not self.task_data['completed']
-        except:
+        task = index.data(TaskListModel.TaskRole)
+        if task is None:
             return False
-    
-    def toggle_complete(self, state):
-        """Toggle task completion status."""
-        completed = state == 2  # Qt.Checked = 2
-        self.task_updated.emit(self.task_id, {'completed': completed})
-        self.setup_styles()  # Update styles
-    
-    def delete_task(self):
-        """Delete this task."""
-        self.task_deleted.emit(self.task_id)
+        
+        pos = event.position().toPoint()
+        if self.checkbox_rect(option.rect).contains(pos):
+            self.task_updated.emit(task['id'], {'completed': not task['completed']})
+            return True
+        if self.delete_rect(option.rect).contains(pos):
+            self.task_deleted.emit(task['id'])
+            return True
+        return False
 
 class StatisticsWidget(QWidget):
-    """Widget for displaying task statistics."""
+    """Widget for displaying task statistics.
+    
+    The cards are built once. update(stats) changes the values shown,
+    touching only the labels whose value changed. The overdue card is
+    restyled through its alert property while any task is overdue.
+    """
     
-    def __init__(self, stats: dict):
+    # Stat key and card title of each card, colors come from the stylesheet
+    STAT_CARDS = [
+        ('total', "Total Tasks"),
+        ('pending', "Pending"),
+        ('completed', "Completed"),
+        ('high_priority', "High Priority"),
+        ('overdue', "Overdue")
+    ]
+    
+    def __init__(self, stats: dict = None):
         super().__init__()
-        self.stats = stats
+        self.stats = stats or {}
+        self.value_labels = {}  # stat key -> value QLabel
+        self.cards = {}  # stat key -> card QFrame
+        self._pending_stats = None
         self.init_ui()
     
     def init_ui(self):
@@ -205,32 +538,44 @@ class StatisticsWidget(QWidget):
         layout.setSpacing(20)
         
         # Create stat cards
-        stat_cards = [
-            ("Total Tasks", self.stats.get('total', 0), "#3498db"),
-            ("Pending", self.stats.get('pending', 0), "#f39c12"),
-            ("Completed", self.stats.get('completed', 0), "#2ecc71"),
-            ("High Priority", self.stats.get('high_priority', 0), "#e74c3c"),
-            ("Overdue", self.stats.get('overdue', 0), "#9b59b6")
-        ]
-        
-        for title, value, color in stat_cards:
-            card = self.create_stat_card(title, value, color)
+        for key, title in self.STAT_CARDS:
+            card = self.create_stat_card(key, title, self.stats.get(key, 0))
             layout.addWidget(card)
         
         self.setLayout(layout)
     
-    def create_stat_card(self, title: str, value: int, color: str) -> QWidget:
+    def update(self, *args):
+        """Show new statistics, or schedule a repaint like QWidget.update().
+        
+        Statistics are applied on the next event loop turn, so a burst of
+        updates only changes the labels once, to the latest values.
+        """
+        if not (len(args) == 1 and isinstance(args[0], dict)):
+            super().update(*args)
+            return
+        
+        if self._pending_stats is None:
+            QTimer.singleShot(0, self._apply_stats)
+        self._pending_stats = args[0]
+    
+    @profiled(category='widgets')
+    def _apply_stats(self):
+        """Set the labels of the cards whose value changed."""
+        stats, self._pending_stats = self._pending_stats, None
+        for key, label in self.value_labels.items():
+            value = stats.get(key, 0)
+            if value != self.stats.get(key, 0):
+                label.setText(str(value))
+        restyle(self.cards['overdue'], alert=stats.get('overdue', 0) > 0)
+        self.stats = stats
+    
+    def create_stat_card(self, key: str, title: str, value: int) -> QWidget:
         """Create a single statistic card."""
         card = QFrame()
         card.setFrameStyle(QFrame.Shape.StyledPanel | QFrame.Shadow.Raised)
-        card.setStyleSheet(f"""
-            QFrame {{
-                background-color: white;
-                border: 1px solid #dee2e6;
-                border-radius: 8px;
-                border-top: 4px solid {color};
-            }}
-        """)
+        card.setProperty('role', "stat-card")
+        card.setProperty('stat', key)
+        self.cards[key] = card
         
         layout = QVBoxLayout()
         layout.setContentsMargins(15, 10, 15, 10)
@@ -241,14 +586,16 @@ class StatisticsWidget(QWidget):
         value_font.setPointSize(24)
         value_font.setBold(True)
         value_label.setFont(value_font)
-        value_label.setStyleSheet(f"color: {color};")
+        value_label.setProperty('role', "stat-value")
+        value_label.setProperty('stat', key)
         value_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(value_label)
+        self.value_labels[key] = value_label
         
         # Title
         title_label = QLabel(title)
         title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        title_label.setStyleSheet("color: #666; font-size: 11px;")
+        title_label.setProperty('role', "stat-title")
         layout.addWidget(title_label)
         
         card.setLayout(layout)
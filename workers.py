@@ -0,0 +1,327 @@
+"""
+Background workers for Task Manager application.
+Keeps slow database work off the GUI thread.
+"""
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+from database import DatabaseManager, StorageProfile
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseRequest:
+    """A call made on the database thread.
+    
+    method is the name of a DatabaseManager method, or a callable taking
+    the DatabaseManager as its first argument.
+    """
+    __slots__ = ('method', 'args', 'kwargs', 'callback', 'errback', 'future')
+    
+    def __init__(self, method, args, kwargs, callback=None, errback=None):
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.callback = callback
+        self.errback = errback
+        self.future = Future()
+    
+    def run(self, db: DatabaseManager):
+        """Run the request against db and resolve its future."""
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            if callable(self.method):
+                result = self.method(db, *self.args, **self.kwargs)
+            else:
+                result = getattr(db, self.method)(*self.args, **self.kwargs)
+        except Exception as error:
+            self.future.set_exception(error)
+        else:
+            self.future.set_result(result)
+
+
+class ProgressReporter(QObject):
+    """Carries progress and cancellation between a worker thread and the GUI.
+    
+    report() and is_cancelled() are called by the work as it runs,
+    progressed is delivered on the GUI thread, and cancel() may be called
+    from any thread.
+    """
+    progressed = pyqtSignal(int, int)  # done, total
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cancelled = threading.Event()
+    
+    def report(self, done: int, total: int):
+        """Report how much of the work is done."""
+        self.progressed.emit(done, total)
+    
+    def cancel(self):
+        """Ask the work to stop at its next check."""
+        self._cancelled.set()
+    
+    def is_cancelled(self) -> bool:
+        """Check whether the work was asked to stop."""
+        return self._cancelled.is_set()
+
+
+class DatabaseThread(QThread):
+    """Thread that owns the database connection and runs requests in order.
+    
+    submit() only queues a request, so the GUI thread never waits on
+    SQLite. Results are delivered through the request future and, on the
+    GUI thread, through its callback. The time the GUI thread spends in
+    submit() and in dispatching results is tracked against a latency
+    budget.
+    
+    read() runs a request on a pool of reader threads instead, using the
+    read-only connections of the database. Reads run alongside the writer
+    and each other, but a read still waits for the requests submitted
+    before it, so it always sees their writes.
+    """
+    request_done = pyqtSignal(object)  # DatabaseRequest
+    
+    LATENCY_BUDGET_MS = 16.0  # one frame at 60 Hz
+    READ_THREADS = 3
+    
+    def __init__(self, db_name: str, profile: StorageProfile, parent=None):
+        super().__init__(parent)
+        self.db_name = db_name
+        self.profile = profile
+        self.max_gui_block_ms = 0.0
+        self._requests = queue.Queue()
+        self._readers = ThreadPoolExecutor(self.READ_THREADS, thread_name_prefix="db-read")
+        self._ready = threading.Event()
+        self._db = None
+        self._open_error = None
+        self._stopped = False
+        # Requests submitted to and finished by the writer, for read ordering
+        self._progress = threading.Condition()
+        self._submitted = 0
+        self._finished = 0
+        self.request_done.connect(self._dispatch)
+    
+    def _record_block(self, started: float):
+        """Record time the GUI thread spent in the data-access layer."""
+        elapsed = (time.perf_counter() - started) * 1000
+        if elapsed > self.max_gui_block_ms:
+            self.max_gui_block_ms = elapsed
+    
+    def within_budget(self) -> bool:
+        """Check the GUI thread never blocked longer than the latency budget."""
+        return self.max_gui_block_ms <= self.LATENCY_BUDGET_MS
+    
+    def submit(self, method, *args, callback=None, errback=None, **kwargs) -> Future:
+        """Queue a request and return its future.
+        
+        callback receives the result and errback the exception, both on
+        the GUI thread. Errors without an errback are logged. Once the
+        thread is stopped the future is cancelled and nothing is called.
+        """
+        started = time.perf_counter()
+        request = DatabaseRequest(method, args, kwargs, callback, errback)
+        if self._stopped:
+            request.future.cancel()
+            return request.future
+        with self._progress:
+            self._submitted += 1
+        self._requests.put(request)
+        self._record_block(started)
+        return request.future
+    
+    def read(self, method, *args, callback=None, errback=None, **kwargs) -> Future:
+        """Queue a read-only request on the reader threads and return its future.
+        
+        Takes the same arguments as submit(). The request must not write,
+        its connection is read-only. Without a reader pool, as for an
+        in-memory database, the request runs on the database thread.
+        """
+        started = time.perf_counter()
+        request = DatabaseRequest(method, args, kwargs, callback, errback)
+        if self._stopped:
+            # Callbacks of requests delivered during shutdown may still read
+            request.future.cancel()
+            return request.future
+        with self._progress:
+            after = self._submitted
+        self._readers.submit(self._run_read, request, after)
+        self._record_block(started)
+        return request.future
+    
+    def _run_read(self, request: DatabaseRequest, after: int):
+        """Run a read once the requests submitted before it have finished."""
+        with self._progress:
+            while self._finished < after:
+                self._progress.wait()
+        
+        db = self.manager()
+        if db is None:
+            request.future.set_exception(self._open_error)
+        elif db.readers is None:
+            # Only the database thread may use the connection
+            with self._progress:
+                self._submitted += 1
+            self._requests.put(request)
+            return
+        else:
+            request.run(db)
+        self.request_done.emit(request)
+    
+    def manager(self):
+        """Wait for the database to open and get its manager, None if it failed.
+        
+        Outside the database thread only its read methods may be used.
+        """
+        self._ready.wait()
+        return self._db
+    
+    def call(self, method, *args, **kwargs):
+        """Run a request and wait for its result.
+        
+        Blocks the calling thread, so it is meant for shutdown only.
+        """
+        return self.submit(method, *args, **kwargs).result()
+    
+    def stop(self):
+        """Finish queued requests, close the database and stop the thread.
+        
+        Requests made afterwards are cancelled.
+        """
+        self._stopped = True
+        self._requests.put(None)
+        self.wait()
+    
+    def _dispatch(self, request: DatabaseRequest):
+        """Deliver a finished request to its callbacks on the GUI thread."""
+        if request.future.cancelled():
+            return
+        
+        started = time.perf_counter()
+        error = request.future.exception()
+        if error is not None:
+            if request.errback is not None:
+                request.errback(error)
+            else:
+                logger.error("Database request %r failed", request.method, exc_info=error)
+        elif request.callback is not None:
+            # Time spent in the callback is UI work, not data access
+            self._record_block(started)
+            request.callback(request.future.result())
+            return
+        self._record_block(started)
+    
+    def run(self):
+        """Open the database and run requests until stopped."""
+        try:
+            db = DatabaseManager(self.db_name, self.profile)
+        except Exception as error:
+            logger.exception("Opening database %s failed", self.db_name)
+            db, self._open_error = None, error
+        self._db = db
+        self._ready.set()
+        
+        while True:
+            request = self._requests.get()
+            if request is None:
+                break
+            if db is None:
+                request.future.set_exception(self._open_error)
+            else:
+                request.run(db)
+            with self._progress:
+                self._finished += 1
+                self._progress.notify_all()
+            self.request_done.emit(request)
+        
+        # Reads still running hold pooled connections until they finish
+        self._readers.shutdown(wait=True)
+        if db is not None:
+            db.close()
+
+
+class SearchWorker(QThread):
+    """Thread running task searches on a reader connection of its own.
+    
+    The connection is checked out of the database's reader pool for as
+    long as the worker runs. Only the most recent query is kept. A query
+    still running when a newer one arrives is interrupted, and its results
+    are dropped.
+    """
+    results_ready = pyqtSignal(int, str, object)  # generation, query, tasks
+    
+    def __init__(self, database: DatabaseThread, limit: int, parent=None):
+        super().__init__(parent)
+        self.database = database
+        self.limit = limit
+        self._condition = threading.Condition()
+        self._pending = None  # (generation, query) waiting to run
+        self._busy = False
+        self._running = True
+        self._conn = None
+    
+    def search(self, generation: int, query: str):
+        """Queue a search, cancelling the one in flight."""
+        with self._condition:
+            self._pending = (generation, query)
+            if self._busy and self._conn is not None:
+                self._conn.interrupt()
+            self._condition.notify()
+    
+    def stop(self):
+        """Stop the worker and wait for it to finish."""
+        with self._condition:
+            self._running = False
+            if self._busy and self._conn is not None:
+                self._conn.interrupt()
+            self._condition.notify()
+        self.wait()
+    
+    def run(self):
+        """Run queued searches until stopped."""
+        db = self.database.manager()
+        if db is None:
+            return
+        if db.readers is None:
+            # Without a reader pool, as for an in-memory database, the
+            # database is only reachable from its thread. Searches run there
+            # in turn with the other requests and are not interrupted.
+            self._serve(lambda query: self.database.submit(
+                'search', query, limit=self.limit).result())
+            return
+        
+        with db.reader() as conn:
+            self._conn = conn
+            self._serve(lambda query: db.search(query, limit=self.limit))
+    
+    def _serve(self, search):
+        """Run queued searches with search(query) until stopped."""
+        while True:
+            with self._condition:
+                while self._running and self._pending is None:
+                    self._condition.wait()
+                if not self._running:
+                    break
+                generation, query = self._pending
+                self._pending = None
+                self._busy = True
+            
+            try:
+                tasks = search(query)
+            except sqlite3.OperationalError:
+                # Interrupted by a newer query
+                tasks = None
+            
+            with self._condition:
+                self._busy = False
+                superseded = self._pending is not None
+            
+            if tasks is not None and not superseded:
+                self.results_ready.emit(generation, query, tasks)